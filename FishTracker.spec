@@ -10,7 +10,11 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=[
+        # Not used by the tracker; pulled in by the build environment otherwise
+        'matplotlib', 'pandas', 'IPython', 'PyQt5', 'PySide2', 'PySide6',
+        'tkinter',
+    ],
     noarchive=False,
     optimize=0,
 )
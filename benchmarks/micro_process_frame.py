@@ -0,0 +1,151 @@
+"""
+Micro-benchmark of FishTracker.process_frame: per-frame latency and allocations.
+
+Frames are decoded up front so only segmentation and tracking are measured. The
+'legacy' variant re-creates the structuring element and lets OpenCV allocate a new
+mask for apply() and for each morphologyEx() call, as process_frame did before the
+per-tracker workspace; 'workspace' is the current FishTracker.
+
+Allocations are measured with tracemalloc (NumPy reports array buffers to it):
+'alloc_count' is the number of new allocations still traced right after the frame
+(i.e. results that outlive the call), 'alloc_kib' is the peak extra memory allocated
+while processing the frame, which includes temporaries freed before it returns.
+
+    python -m benchmarks.micro_process_frame
+    python -m benchmarks.micro_process_frame --width 1920 --height 1080 --frames 300
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import cached_video
+from utils.options import SearchOptions, SegmentationOptions
+from utils.tracker import FishTracker
+
+CACHE_DIR = os.path.join(ROOT, 'benchmarks', '.cache')
+
+
+class LegacyFishTracker(FishTracker):
+    """FishTracker with the allocating segmentation path it had before the workspace."""
+
+    def subtract_background(self, small):
+        return self.fgbg.apply(small)
+
+    def clean_mask(self, fgmask, window=None):
+        if window is not None:
+            x0, y0, x1, y1 = window
+            fgmask = fgmask[y0:y1, x0:x1]
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        fgmask = cv2.morphologyEx(fgmask, cv2.MORPH_CLOSE, kernel)
+        fgmask = cv2.morphologyEx(fgmask, cv2.MORPH_OPEN, kernel)
+        self.profiler.lap('morphology')
+        return fgmask
+
+
+VARIANTS = {
+    'legacy': LegacyFishTracker,
+    'workspace': FishTracker,
+}
+
+
+def read_frames(video_path, count):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def measure(tracker_cls, video_path, frames, warmup, options):
+    out = tempfile.mkdtemp(prefix='fishmicro_')
+    try:
+        # Latency pass, without tracemalloc overhead
+        tracker = tracker_cls(video_path, out, **options)
+        latencies = []
+        for i, frame in enumerate(frames):
+            frame = frame.copy()  # process_frame may draw on it
+            t0 = time.perf_counter()
+            tracker.process_frame(frame)
+            if i >= warmup:
+                latencies.append(time.perf_counter() - t0)
+
+        # Allocation pass on a fresh tracker (same frames, same state evolution)
+        tracker = tracker_cls(video_path, out, **options)
+        counts, kib = [], []
+        tracemalloc.start()
+        try:
+            for i, frame in enumerate(frames):
+                frame = frame.copy()
+                before = tracemalloc.take_snapshot() if i >= warmup else None
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+                tracker.process_frame(frame)
+                if before is None:
+                    continue
+                kib.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+                after = tracemalloc.take_snapshot()
+                counts.append(sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'traceback')))
+        finally:
+            tracemalloc.stop()
+
+        ms = np.array(latencies) * 1000
+        return {
+            'frames': len(latencies),
+            'mean_ms': round(float(ms.mean()), 3),
+            'p50_ms': round(float(np.percentile(ms, 50)), 3),
+            'p95_ms': round(float(np.percentile(ms, 95)), 3),
+            'alloc_count': round(float(np.mean(counts)), 1),
+            'alloc_kib': round(float(np.mean(kib)), 1),
+        }
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--frames', type=int, default=200, help='frames to measure (after warm-up)')
+    parser.add_argument('--warmup', type=int, default=30, help='frames processed before measuring')
+    parser.add_argument('--scale', type=float, default=1.0, help='segmentation processing_scale passed to the tracker')
+    parser.add_argument('--predictive', action='store_true', help='measure the predictive search window path')
+    args = parser.parse_args(argv)
+
+    fps = 30
+    video_path = cached_video(CACHE_DIR, width=args.width, height=args.height, fps=fps,
+                              duration_s=max(1, -(-(args.frames + args.warmup) // fps)),
+                              fish_length=max(0.06, 40 / args.width))
+    frames = read_frames(video_path, args.frames + args.warmup)
+    options = {'segmentation': SegmentationOptions(processing_scale=args.scale),
+               'search': SearchOptions() if args.predictive else None}
+
+    print(f"process_frame at {args.width}x{args.height}, scale {args.scale}, "
+          f"{len(frames) - args.warmup} frames after {args.warmup} warm-up")
+    results = {name: measure(cls, video_path, frames, args.warmup, options) for name, cls in VARIANTS.items()}
+    for name, result in results.items():
+        print(f"  {name:<10} " + ", ".join(f"{k}={v}" for k, v in result.items()))
+
+    legacy, current = results['legacy'], results['workspace']
+    if legacy['mean_ms']:
+        print(f"  latency {current['mean_ms'] / legacy['mean_ms'] - 1:+.1%}, "
+              f"allocated memory {current['alloc_kib'] - legacy['alloc_kib']:+.1f} KiB/frame")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+Speed / memory / accuracy benchmarks on synthetic tank videos.
+
+Every case runs in a fresh process so peak RSS is per case. Results can be saved
+as a baseline and later runs are compared against it:
+
+    python -m benchmarks.run_benchmarks --save-baseline
+    python -m benchmarks.run_benchmarks            # compares, exits 1 on regression
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import cached_video, load_truth
+
+CACHE_DIR = os.path.join(ROOT, 'benchmarks', '.cache')
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Higher is better for these; everything else in a result is lower-is-better or informational
+HIGHER_IS_BETTER = {'fps', 'files_per_s', 'detection_rate'}
+COMPARED = ('fps', 'files_per_s', 'peak_rss_mb', 'mean_error_px', 'p95_error_px', 'distance_error_pct')
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 1024
+
+
+def tracking_error(video_path, frames, cx, cy):
+    """Error of tracked centroids against ground truth at the frames the tracker reported."""
+    t_frame, t_cx, t_cy = load_truth(video_path)
+    frames = np.asarray(frames)
+    valid = frames < len(t_frame)
+    err = np.hypot(np.asarray(cx)[valid] - t_cx[frames[valid]], np.asarray(cy)[valid] - t_cy[frames[valid]])
+    return {
+        'detection_rate': round(float(valid.sum()) / len(t_frame), 4),
+        'mean_error_px': round(float(err.mean()), 3) if len(err) else None,
+        'p95_error_px': round(float(np.percentile(err, 95)), 3) if len(err) else None,
+    }
+
+
+def bench_tracker(tracker_cls, video_path, options):
+    out = tempfile.mkdtemp(prefix='fishbench_')
+    try:
+        tracker = tracker_cls(video_path, out, **options)
+        t0 = time.perf_counter()
+        tracker.run()
+        elapsed = time.perf_counter() - t0
+        traj = tracker.trajectory
+        result = {'fps': round((tracker.frame_index + 1) / elapsed, 2) if elapsed else None}
+        result.update(tracking_error(video_path, traj['frame'], traj['cx'], traj['cy']))
+        return result
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+
+def bench_fish_tracker(video_path, options):
+    from utils.tracker import FishTracker
+    return bench_tracker(FishTracker, video_path, options)
+
+
+def bench_simple_tracker(video_path, options):
+    from utils.simple_tracker import SimpleFishTracker
+    return bench_tracker(SimpleFishTracker, video_path, options)
+
+
+def bench_distance_summary(video_path, options):
+    """Track once, replicate the CSV `copies` times and time calculate_summary over them."""
+    from utils.tracker import FishTracker
+    from distance_calculator import calculate_summary
+    from utils.formats import read_trajectory
+    from utils.kinematics import pixel_scale, resample_indices
+
+    out = tempfile.mkdtemp(prefix='fishbench_')
+    try:
+        tracker = FishTracker(video_path, out)
+        tracker.run()
+        tracker.save_results()
+        name = tracker.video_name
+        width, height = tracker.frame_size
+        data_dir = os.path.join(out, 'data')
+        for i in range(options.get('copies', 200)):
+            shutil.copy(os.path.join(data_dir, f"{name}.csv"), os.path.join(data_dir, f"{name}_{i}.csv"))
+            shutil.copy(os.path.join(data_dir, f"{name}.meta.json"), os.path.join(data_dir, f"{name}_{i}.meta.json"))
+        files = len([f for f in os.listdir(data_dir) if f.endswith('.csv')])
+
+        t0 = time.perf_counter()
+        resample_ms = options.get('resample_ms', 2000)
+        summary = calculate_summary(out, workers=options.get('workers', 1), resample_ms=resample_ms)
+        elapsed = time.perf_counter() - t0
+
+        with open(summary, encoding='utf-8') as f:
+            measured = float(next(line for line in f if line.startswith(name + ',')).split(',')[1])
+        # Ground truth at the frames of the rows the summary kept, so only tracking error remains
+        traj = read_trajectory(os.path.join(data_dir, f"{name}.csv"))
+        frames = traj['frame'][resample_indices(traj['t_ms'], resample_ms)]
+        _, t_cx, t_cy = load_truth(video_path)
+        frames = frames[frames < len(t_cx)]
+        sx, sy = pixel_scale(width, height, 28, 14)
+        truth = float(np.hypot(np.diff(t_cx[frames] * sx), np.diff(t_cy[frames] * sy)).sum())
+        return {
+            'files_per_s': round(files / elapsed, 2),
+            'distance_error_pct': round(abs(measured - truth) / truth * 100, 3) if truth else None,
+        }
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+
+BENCHMARKS = {
+    'fish_tracker': bench_fish_tracker,
+    'simple_tracker': bench_simple_tracker,
+    'distance_summary': bench_distance_summary,
+}
+
+
+def default_cases(quick=False):
+    video = {'duration_s': 5 if quick else 20}
+    cases = []
+    for width, height in ((640, 360), (1280, 720)) if quick else ((640, 360), (1280, 720), (1920, 1080)):
+        v = dict(video, width=width, height=height, fish_length=max(0.06, 40 / width))
+        cases.append({'name': f'fish_tracker_{height}p', 'bench': 'fish_tracker', 'video': v, 'options': {}})
+        cases.append({'name': f'simple_tracker_{height}p', 'bench': 'simple_tracker', 'video': v, 'options': {}})
+    cases.append({'name': 'fish_tracker_720p_max_speed', 'bench': 'fish_tracker',
+                  'video': dict(video, width=1280, height=720), 'options': {'max_speed': True}})
+    cases.append({'name': 'distance_summary', 'bench': 'distance_summary',
+                  'video': dict(video, width=640, height=360, fish_length=0.0625), 'options': {'copies': 200}})
+    return cases
+
+
+def _run_case(case, conn):
+    try:
+        video_path = cached_video(CACHE_DIR, **case['video'])
+        result = BENCHMARKS[case['bench']](video_path, case['options'])
+        rss = peak_rss_mb()
+        result['peak_rss_mb'] = round(rss, 1) if rss is not None else None
+        conn.send(result)
+    except Exception as e:
+        conn.send({'error': repr(e)})
+    finally:
+        conn.close()
+
+
+def run_case(case):
+    """Run one case in a fresh process; returns its result dict."""
+    ctx = multiprocessing.get_context('spawn')
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_case, args=(case, child))
+    proc.start()
+    child.close()
+    result = parent.recv()
+    proc.join()
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages (empty when everything is within tolerance)."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        for metric in COMPARED:
+            new, old = result.get(metric), base.get(metric)
+            if new is None or old is None or old == 0:
+                continue
+            change = (new - old) / abs(old)
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > tolerance:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='short videos and fewer resolutions')
+    parser.add_argument('--only', nargs='*', help='run only cases whose name contains one of these')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed relative regression (default 0.15)')
+    parser.add_argument('--output', help='also write this run as JSON to this path')
+    args = parser.parse_args(argv)
+
+    cases = default_cases(args.quick)
+    if args.only:
+        cases = [c for c in cases if any(o in c['name'] for o in args.only)]
+
+    results = {}
+    for case in cases:
+        print(f"▶️ {case['name']} ...", flush=True)
+        results[case['name']] = result = run_case(case)
+        print("   " + ", ".join(f"{k}={v}" for k, v in result.items()), flush=True)
+
+    run = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'platform': sys.platform,
+           'cpu_count': os.cpu_count(), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2)
+        print(f"\n✅ Baseline saved to: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nℹ️ No baseline yet; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ Regressions against baseline:")
+        for line in regressions:
+            print("   " + line)
+        return 1
+    print("\n✅ No regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Start-up cost of the entry points: import time broken down by module.
+
+Each entry module is imported in a fresh interpreter with ``python -X importtime``
+(best of --repeat runs, as the first run also pays for cold disk caches). For every
+module the total import time and the slowest imports (cumulative, i.e. including what
+they import) are listed. The GUI must open its window without OpenCV or NumPy; it is
+reported as a failure (exit 1) if either is imported eagerly again, as is pyarrow for the
+CLI (it is only needed for parquet files).
+
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --modules gui --top 20 --max-ms 150
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported when the entry module is imported
+DEFERRED = {
+    'gui': ('cv2', 'numpy'),
+    'main': ('pyarrow',),
+}
+
+
+def import_times(module):
+    """Return [(name, self_us, cumulative_us)] for one fresh `import module`."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def best_run(module, repeat):
+    runs = [import_times(module) for _ in range(repeat)]
+    return min(runs, key=lambda rows: total_ms(module, rows))
+
+
+def total_ms(module, rows):
+    return next(cumulative for name, _, cumulative in rows if name == module) / 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=['gui', 'main'], help='entry modules to import')
+    parser.add_argument('--repeat', type=int, default=3, help='fresh interpreters per module (best is reported)')
+    parser.add_argument('--top', type=int, default=10, help='slowest imports to list per module')
+    parser.add_argument('--max-ms', type=float, default=None, help='fail if a module takes longer to import')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        rows = best_run(module, args.repeat)
+        total = total_ms(module, rows)
+        names = {row[0] for row in rows}
+        print(f"{module}: {total:.1f} ms, {len(rows)} modules imported")
+        for name, self_us, cumulative_us in sorted(
+                (row for row in rows if row[0] != module), key=lambda row: row[2], reverse=True)[:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {name}")
+
+        eager = [name for name in DEFERRED.get(module, ()) if name in names]
+        if eager:
+            print(f"  FAIL: {', '.join(eager)} imported at start-up (should be deferred)")
+            failed = True
+        if args.max_ms is not None and total > args.max_ms:
+            print(f"  FAIL: {total:.1f} ms exceeds the {args.max_ms:g} ms budget")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
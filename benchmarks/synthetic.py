@@ -0,0 +1,98 @@
+"""
+Synthetic tank videos with a known fish path, for benchmarks.
+
+A dark ellipse swims a smooth pseudo-random path over a textured background with
+sensor noise and slow lighting drift. The ground truth centroid of every frame is
+saved next to the video as <name>.truth.npz (frame, cx, cy).
+"""
+import os
+import json
+import hashlib
+import cv2
+import numpy as np
+
+DEFAULTS = {
+    'width': 1280,
+    'height': 720,
+    'fps': 30,
+    'duration_s': 20,
+    'fish_length': 0.06,     # fraction of frame width
+    'noise_sigma': 4.0,      # grey levels
+    'drift_amplitude': 12.0, # grey levels, slow global lighting change
+    'seed': 0,
+}
+
+
+def fish_path(n_frames, width, height, fps, rng):
+    """Smooth path from a sum of random sinusoids, kept inside a 10% margin."""
+    t = np.arange(n_frames) / fps
+    path = []
+    for size in (width, height):
+        freqs = rng.uniform(0.02, 0.25, 4)
+        phases = rng.uniform(0, 2 * np.pi, 4)
+        weights = rng.uniform(0.5, 1.0, 4)
+        wave = (weights[:, None] * np.sin(2 * np.pi * freqs[:, None] * t + phases[:, None])).sum(0) / weights.sum()
+        path.append(size / 2 + wave * size * 0.4)
+    return np.rint(path[0]).astype(np.int32), np.rint(path[1]).astype(np.int32)
+
+
+def background_image(width, height, rng):
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = 170 + 20 * np.sin(xx / width * 3) * np.cos(yy / height * 2)
+    texture = cv2.GaussianBlur(rng.normal(0, 8, (height, width)).astype(np.float32), (0, 0), 3)
+    return base + texture
+
+
+def generate(path, **params):
+    """
+    Write a synthetic video to `path` and its ground truth to `<path>.truth.npz`.
+
+    Returns:
+        (frame, cx, cy) ground-truth arrays.
+    """
+    p = dict(DEFAULTS, **params)
+    width, height, fps = p['width'], p['height'], p['fps']
+    n_frames = int(p['duration_s'] * fps)
+    rng = np.random.default_rng(p['seed'])
+
+    xs, ys = fish_path(n_frames, width, height, fps, rng)
+    background = background_image(width, height, rng)
+    noise_bank = [rng.normal(0, p['noise_sigma'], (height, width)).astype(np.float32) for _ in range(8)]
+    axes = (max(4, int(p['fish_length'] * width / 2)), max(2, int(p['fish_length'] * width / 5)))
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    frame_f = np.empty((height, width), np.float32)
+    for i in range(n_frames):
+        drift = p['drift_amplitude'] * np.sin(2 * np.pi * i / max(n_frames, 1))
+        np.add(background, noise_bank[i % len(noise_bank)], out=frame_f)
+        frame_f += drift
+        gray = np.clip(frame_f, 0, 255).astype(np.uint8)
+        j = min(i + 1, n_frames - 1)
+        angle = np.degrees(np.arctan2(ys[j] - ys[i - 1 if i else 0], xs[j] - xs[i - 1 if i else 0]))
+        cv2.ellipse(gray, (int(xs[i]), int(ys[i])), axes, angle, 0, 360, 35, -1)
+        writer.write(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+    writer.release()
+
+    frames = np.arange(n_frames, dtype=np.int32)
+    np.savez(truth_path(path), frame=frames, cx=xs, cy=ys, params=json.dumps(p))
+    return frames, xs, ys
+
+
+def truth_path(video_path):
+    return os.path.splitext(video_path)[0] + '.truth.npz'
+
+
+def load_truth(video_path):
+    data = np.load(truth_path(video_path))
+    return data['frame'], data['cx'], data['cy']
+
+
+def cached_video(cache_dir, **params):
+    """Generate a video once per parameter set and reuse it on later runs."""
+    p = dict(DEFAULTS, **params)
+    key = hashlib.sha1(json.dumps(p, sort_keys=True).encode()).hexdigest()[:10]
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"synthetic_{p['width']}x{p['height']}_{p['fps']}fps_{key}.mp4")
+    if not (os.path.exists(path) and os.path.exists(truth_path(path))):
+        generate(path, **p)
+    return path
@@ -1,80 +1,176 @@
 import os
 import csv
-import math
-import cv2
-from typing import Optional
+import json
+import concurrent.futures
+from typing import Optional, Tuple, Union
+from utils.constants import VIDEO_EXTENSIONS
+from utils.metadata import read_metadata
+from utils.formats import find_trajectories, read_trajectory
+from utils.trajectory import Trajectory, read_multi_csv
+from utils.kinematics import pixel_scale, resample_indices, kinematics, summarize
+
+# Starting a worker (a spawned interpreter importing NumPy, ~0.3 s) only pays off when
+# it has enough files to summarise; smaller jobs run inline.
+MIN_FILES_PER_WORKER = 50
+
+# utils.kinematics.summarize key -> summary CSV column
+SUMMARY_COLUMNS = (
+    ('total_distance_cm', 'Total Distance (cm)'),
+    ('duration_s', 'Duration (s)'),
+    ('mean_speed_cm_s', 'Mean Speed (cm/s)'),
+    ('max_speed_cm_s', 'Max Speed (cm/s)'),
+    ('immobile_time_s', 'Immobile Time (s)'),
+    ('immobility_bouts', 'Immobility Bouts'),
+)
+# Part of every cache key; bump it when the cached rows change shape
+CACHE_VERSION = 2
+
+
+def probe_frame_size(video_path: str) -> Optional[Tuple[int, int]]:
+    """(width, height) read from the video container, or None if it cannot be opened."""
+    import cv2  # only for files without a metadata sidecar; keeps summary workers light
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Warning: Could not open video {video_path}. Skipping.")
+        return None
+
+    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    return frame_width, frame_height
+
 
 def calculate_total_distance(
-    csv_path: str,
-    video_path: str,
+    csv_path: Union[str, Trajectory],
+    video_path: Optional[str] = None,
     real_width_cm: float = 28,
     real_height_cm: float = 14,
-    frame_skip: int = 60
+    frame_skip: int = 60,
+    resample_ms: Optional[float] = None,
+    frame_size: Optional[Tuple[int, int]] = None,
+    source: Optional[str] = None
 ) -> Optional[float]:
     """
     Calculate total distance traveled (in cm) based on centroid points from CSV and video resolution.
 
     Args:
-        csv_path: Path to CSV file containing Centroid_X and Centroid_Y columns.
-        video_path: Path to the corresponding video file.
+        csv_path: Path to a trajectory file (CSV, or any format in utils.formats),
+            or an in-memory Trajectory from the tracker.
+        video_path: Path to the corresponding video file. Only opened when
+            `frame_size` is not given.
         real_width_cm: Real-world width of the tank/view in cm.
         real_height_cm: Real-world height of the tank/view in cm.
         frame_skip: Skip every n frames for distance calculation (default 60).
+        resample_ms: Sample one point per this many ms of video instead of every
+            `frame_skip` rows; independent of fps and tracker frame stride.
+        frame_size: (width, height) of the video, e.g. from the metadata sidecar.
+        source: File named in messages when `csv_path` is a Trajectory.
 
     Returns:
         Total distance traveled in cm or None on failure.
     """
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"Warning: Could not open video {video_path}. Skipping.")
-        return None
+    summary = calculate_track_summary(csv_path, video_path, real_width_cm, real_height_cm, frame_skip,
+                                      resample_ms, frame_size, source)
+    return None if summary is None else summary['total_distance_cm']
 
-    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    cap.release()
 
-    points = []
-    try:
-        with open(csv_path, newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for idx, row in enumerate(reader):
-                if idx % frame_skip != 0:
-                    continue
-                try:
-                    x = int(row['Centroid_X'])
-                    y = int(row['Centroid_Y'])
-                except (KeyError, ValueError):
-                    print(f"Skipping invalid row in {csv_path}: {row}")
-                    continue
-                points.append((x, y))
-    except Exception as e:
-        print(f"Error reading CSV {csv_path}: {e}")
-        return None
+def calculate_track_summary(
+    csv_path: Union[str, Trajectory],
+    video_path: Optional[str] = None,
+    real_width_cm: float = 28,
+    real_height_cm: float = 14,
+    frame_skip: int = 60,
+    resample_ms: Optional[float] = None,
+    frame_size: Optional[Tuple[int, int]] = None,
+    source: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Distance, speeds and immobility of one trajectory (utils.kinematics.summarize), sampled
+    like calculate_total_distance, whose arguments it takes.
 
-    if len(points) < 2:
+    Returns:
+        The summary dict or None on failure.
+    """
+    if frame_size is None:
+        frame_size = probe_frame_size(video_path)
+        if frame_size is None:
+            return None
+    frame_width, frame_height = frame_size
+    if isinstance(csv_path, Trajectory):
+        trajectory = csv_path
+        csv_path = source or "trajectory"
+    else:
+        try:
+            trajectory = read_trajectory(csv_path)
+        except Exception as e:
+            print(f"Error reading {csv_path}: {e}")
+            return None
+
+    keep = resample_indices(trajectory['t_ms'], resample_ms, frame_skip)
+
+    if len(keep) < 2:
         print(f"Not enough points in {csv_path} to calculate distance.")
-        return 0
 
-    total_pixel_distance = sum(
-        math.sqrt((points[i][0] - points[i-1][0]) ** 2 + (points[i][1] - points[i-1][1]) ** 2)
-        for i in range(1, len(points))
-    )
+    # X and Y are calibrated separately; averaging them is wrong for non-square views
+    scale = pixel_scale(frame_width, frame_height, real_width_cm, real_height_cm)
+    k = kinematics(trajectory['t_ms'][keep], trajectory['cx'][keep], trajectory['cy'][keep], scale)
+    return summarize(k)
 
-    pixel_to_cm_x = real_width_cm / frame_width
-    pixel_to_cm_y = real_height_cm / frame_height
-    pixel_to_cm = (pixel_to_cm_x + pixel_to_cm_y) / 2
 
-    return total_pixel_distance * pixel_to_cm
+def find_video(videos_dir: str, name: str) -> Optional[str]:
+    for ext in VIDEO_EXTENSIONS:
+        for candidate in (name + ext, name + ext.upper()):
+            path = os.path.join(videos_dir, candidate)
+            if os.path.exists(path):
+                return path
+    return None
 
 
-def calculate_summary(output_root: str, videos_dir: Optional[str] = None) -> Optional[str]:
+def _load_cache(cache_path: str) -> dict:
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _summary_job(job: Tuple[str, str, Optional[str], Optional[Tuple[int, int]], bool, Optional[float]]) -> Tuple[str, list]:
+    """Returns (video name, [(summary row label, summary dict or None), ...]); multi-fish CSVs give one row per fish."""
+    name, csv_path, video_path, frame_size, multi_fish, resample_ms = job
+    if not multi_fish:
+        return name, [(name, calculate_track_summary(csv_path, video_path, resample_ms=resample_ms,
+                                                     frame_size=frame_size))]
+    try:
+        tracks = read_multi_csv(csv_path)
+    except Exception as e:
+        print(f"Error reading CSV {csv_path}: {e}")
+        return name, [(name, None)]
+    return name, [(f"{name}_fish{fish_id}",
+                   calculate_track_summary(traj, video_path, resample_ms=resample_ms, frame_size=frame_size,
+                                           source=f"{csv_path} (fish {fish_id})"))
+                  for fish_id, traj in sorted(tracks.items())]
+
+
+def calculate_summary(output_root: str, videos_dir: Optional[str] = None, workers: Optional[int] = None,
+                      resample_ms: Optional[float] = 2000) -> Optional[str]:
     """
-    Calculate distance summaries for all CSVs in output_root/data
-    and save a summary CSV in output_root.
+    Calculate distance summaries for all trajectory files in output_root/data
+    and save a summary CSV in output_root: total distance, then duration, mean and
+    maximum speed and immobility (see utils.kinematics.summarize). Binary formats (npy/parquet/npz) are
+    preferred over CSV when a video has several.
+
+    Frame sizes come from the tracker's metadata sidecars, so videos are only opened
+    for files that have none. Results are cached in output_root/.distance_cache.json
+    keyed by each file's size and mtime; unchanged files are not recomputed.
 
     Args:
         output_root: Folder where `data` folder with CSVs is located and summary CSV will be saved.
         videos_dir: Optional folder where original videos are stored. Defaults to sibling "videos" folder.
+        workers: Process pool size for uncached CSVs. Defaults to the number of CPU cores;
+            small jobs (under MIN_FILES_PER_WORKER files per worker) run inline.
+        resample_ms: Use one point per this many ms of video, so the distance does not
+            depend on fps or the tracker's frame stride. None samples every 60th row as
+            older versions did.
 
     Returns:
         Path to summary CSV or None on failure.
@@ -84,37 +180,70 @@ def calculate_summary(output_root: str, videos_dir: Optional[str] = None) -> Opt
         videos_dir = os.path.join(os.path.dirname(output_root), 'videos')
 
     summary_csv = os.path.join(output_root, 'distance_summary.csv')
+    cache_path = os.path.join(output_root, '.distance_cache.json')
 
-    if not os.path.exists(data_dir) or not os.path.exists(videos_dir):
+    if not os.path.exists(data_dir):
         print("❌ Required directories not found.")
         return None
 
-    csv_files = [f for f in os.listdir(data_dir) if f.lower().endswith('.csv')]
-    if not csv_files:
-        print("❌ No CSV files found in data directory.")
+    trajectory_files = find_trajectories(data_dir)
+    if not trajectory_files:
+        print("❌ No trajectory files found in data directory.")
         return None
 
-    results = []
-    for csv_file in csv_files:
-        name = os.path.splitext(csv_file)[0]
-        video_path = os.path.join(videos_dir, name + ".mp4")
-        csv_path = os.path.join(data_dir, csv_file)
+    cache = _load_cache(cache_path)
+    summaries = {}
+    jobs = []
+    for name, data_path in sorted(trajectory_files.items()):
+        stat = os.stat(data_path)
+        key = [stat.st_size, stat.st_mtime_ns, resample_ms, CACHE_VERSION]
 
-        if not os.path.exists(video_path):
-            print(f"⚠️ Missing video for: {csv_file}")
+        cached = cache.get(name)
+        if cached and cached['key'] == key and 'rows' in cached:
+            summaries.update(cached['rows'])
             continue
 
-        distance = calculate_total_distance(csv_path, video_path)
-        if distance is not None:
-            results.append([name, f"{distance:.2f}"])
+        metadata = read_metadata(output_root, name)
+        if metadata:
+            video_path, frame_size = None, (metadata['width'], metadata['height'])
+            multi_fish = bool(metadata.get('tracker', {}).get('multi_fish'))
+        else:
+            video_path, frame_size, multi_fish = find_video(videos_dir, name), None, False
+            if video_path is None:
+                print(f"⚠️ Missing video for: {os.path.basename(data_path)}")
+                continue
+        cache[name] = {'key': key, 'rows': None}
+        jobs.append((name, data_path, video_path, frame_size, multi_fish, resample_ms))
+
+    if jobs:
+        workers = min(workers or os.cpu_count() or 1, len(jobs) // MIN_FILES_PER_WORKER)
+        if workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                computed = list(executor.map(_summary_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
         else:
-            results.append([name, "Error"])
+            computed = [_summary_job(job) for job in jobs]
+        for name, rows in computed:
+            summaries.update(rows)
+            if all(summary is not None for _, summary in rows):
+                cache[name]['rows'] = rows
+
+    results = []
+    for name in sorted(summaries):
+        summary = summaries[name]
+        if summary is not None:
+            results.append([name] + [summary[key] if isinstance(summary[key], int) else f"{summary[key]:.2f}"
+                                     for key, _ in SUMMARY_COLUMNS])
+        else:
+            results.append([name, "Error"] + [""] * (len(SUMMARY_COLUMNS) - 1))
 
     os.makedirs(output_root, exist_ok=True)
     with open(summary_csv, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
-        writer.writerow(['Video', 'Total Distance (cm)'])
+        writer.writerow(['Video'] + [column for _, column in SUMMARY_COLUMNS])
         writer.writerows(results)
 
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({name: entry for name, entry in cache.items() if entry.get('rows')}, f)
+
     print(f"\n✅ Distance summary saved to: {summary_csv}")
     return summary_csv
@@ -3,12 +3,16 @@ import webbrowser
 from tkinter import filedialog, messagebox, scrolledtext
 import os
 import sys
-import concurrent.futures
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from tracker_wrapper import process_video
-from distance_calculator import calculate_summary  # We'll add this function next
 
-NUM_WORKERS = 10
+# OpenCV, NumPy and the trackers (utils.batch, distance_calculator) are imported on a
+# background thread once the window is up, see FishTrackerGUI.warm_up.
+NUM_WORKERS = os.cpu_count() or 1
 
 def get_resource_path(relative_path):
     """Get absolute path to resource, works for PyInstaller and dev mode"""
@@ -36,15 +40,29 @@ class FishTrackerGUI:
         tk.Button(master, text="Browse", command=self.select_output_folder).grid(row=1, column=2)
 
         # Buttons
-        tk.Button(master, text="Start Tracking", command=self.start_tracking).grid(row=2, column=1, pady=5)
-        tk.Button(master, text="Calculate Distance Summary", command=self.run_distance_summary).grid(row=3, column=1, pady=5)
-        tk.Button(master, text="Quit", command=master.quit).grid(row=4, column=1, pady=5)
+        self.start_button = tk.Button(master, text="Start Tracking", command=self.start_tracking)
+        self.start_button.grid(row=2, column=1, pady=5)
+        self.profile_enabled = tk.BooleanVar(value=False)
+        tk.Checkbutton(master, text="Profile stages", variable=self.profile_enabled).grid(row=2, column=2, sticky="w")
+        controls = tk.Frame(master)
+        controls.grid(row=3, column=2, sticky="w")
+        self.pause_button = tk.Button(controls, text="Pause", command=self.toggle_pause, state=tk.DISABLED)
+        self.pause_button.pack(side="left")
+        self.cancel_button = tk.Button(controls, text="Cancel", command=self.cancel_tracking, state=tk.DISABLED)
+        self.cancel_button.pack(side="left", padx=5)
+        self.summary_button = tk.Button(master, text="Calculate Distance Summary", command=self.run_distance_summary)
+        self.summary_button.grid(row=3, column=1, pady=5)
+        tk.Button(master, text="Quit", command=self.close).grid(row=4, column=1, pady=5)
+        master.protocol("WM_DELETE_WINDOW", self.close)
 
         # Progress display
         self.progress = tk.DoubleVar()
         self.progress_bar = tk.Scale(master, variable=self.progress, from_=0, to=100,
                                      orient="horizontal", length=400, label="Progress (%)")
         self.progress_bar.grid(row=5, column=0, columnspan=3, pady=10)
+        self.progress_text = tk.StringVar()
+        tk.Label(master, textvariable=self.progress_text, anchor="w", justify="left").grid(
+            row=8, column=0, columnspan=3, sticky="w", padx=10)
 
         self.status_box = scrolledtext.ScrolledText(master, width=80, height=10)
         self.status_box.grid(row=6, column=0, columnspan=3, padx=10, pady=5)
@@ -53,7 +71,34 @@ class FishTrackerGUI:
         link.grid(row=7, column=0, columnspan=3, pady=(0, 10))
         link.bind("<Button-1>", lambda e: webbrowser.open_new("https://github.com/Dilshan-Pathirana"))
 
-
+        # Batch results arrive from a worker thread through this queue and are drained with after().
+        # Frame-level progress comes straight from the worker processes through a Manager queue,
+        # and cancel/pause are Manager events the trackers check every few frames.
+        self.events = queue.Queue()
+        self.manager = None
+        self.progress_queue = None
+        self.cancel_event = None
+        self.pause_event = None
+        self.batch = None
+        self.master.after(100, self.poll_events)
+
+        # Worker pool started in the background so the window shows immediately
+        self.pool = None
+        self.ready = threading.Event()
+        self.waiting_to_start = False
+        self.master.after(200, lambda: threading.Thread(target=self.warm_up, daemon=True).start())
+
+    def warm_up(self):
+        """Background thread: import the tracking stack and start the Manager and a warm worker pool."""
+        try:
+            from utils.batch import start_pool
+            self.manager = multiprocessing.Manager()
+            self.progress_queue = self.manager.Queue()
+            self.pool = start_pool(NUM_WORKERS)
+        except Exception as e:
+            self.events.put(('log', f"⚠️ Could not pre-start workers ({e}); they will start with the batch", 0, 0))
+        finally:
+            self.ready.set()
 
     def select_video_folder(self):
         folder = filedialog.askdirectory()
@@ -68,7 +113,6 @@ class FishTrackerGUI:
     def log_message(self, msg):
         self.status_box.insert(tk.END, msg + "\n")
         self.status_box.see(tk.END)
-        self.master.update_idletasks()
 
     def start_tracking(self):
         video_folder = self.video_dir.get()
@@ -78,10 +122,20 @@ class FishTrackerGUI:
             messagebox.showwarning("Missing Input", "Please select both input and output folders.")
             return
 
-        video_files = sorted([
-            os.path.join(video_folder, f) for f in os.listdir(video_folder)
-            if f.lower().endswith((".mp4", ".avi", ".mov"))
-        ])
+        if not self.ready.is_set():
+            # Clicked before the warm-up finished; try again shortly instead of blocking the window
+            if not self.waiting_to_start:
+                self.waiting_to_start = True
+                self.start_button.config(state=tk.DISABLED)
+                self.log_message("⏳ Starting worker processes...")
+            self.master.after(200, self.start_tracking)
+            return
+        if self.waiting_to_start:
+            self.waiting_to_start = False
+            self.start_button.config(state=tk.NORMAL)
+
+        from utils.batch import list_videos
+        video_files = list_videos(video_folder)
 
         if not video_files:
             messagebox.showerror("No Videos", "No video files found in the selected folder.")
@@ -95,52 +149,203 @@ class FishTrackerGUI:
         for v in video_files:
             self.log_message(f"  • {os.path.basename(v)}")
 
-        batch_size = 10
-        total = len(video_files)
         log_filename = os.path.join(output_folder, f"batch_log_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt")
+        self.log_message(f"\n▶️ Starting {len(video_files)} videos on {NUM_WORKERS} worker processes")
+
+        if self.manager is None:
+            self.manager = multiprocessing.Manager()
+            self.progress_queue = self.manager.Queue()
+        while not self.progress_queue.empty():  # stale updates from a cancelled batch
+            self.progress_queue.get_nowait()
+        self.cancel_event = self.manager.Event()
+        self.pause_event = self.manager.Event()
+        # video -> (frames done, frame count) for running videos; finished ones only add to frames_done
+        self.batch = {'started': time.perf_counter(), 'total': len(video_files), 'completed': 0,
+                      'running': {}, 'finished': set(), 'frames_done': 0}
+
+        self.start_button.config(state=tk.DISABLED)
+        self.pause_button.config(state=tk.NORMAL, text="Pause")
+        self.cancel_button.config(state=tk.NORMAL)
+        options = {'profile': self.profile_enabled.get(), 'progress_queue': self.progress_queue,
+                   'cancel': self.cancel_event, 'pause': self.pause_event}
+        threading.Thread(target=self.batch_worker, args=(video_files, output_folder, log_filename, options),
+                         daemon=True).start()
+
+    def toggle_pause(self):
+        if self.pause_event.is_set():
+            self.pause_event.clear()
+            self.pause_button.config(text="Pause")
+            self.log_message("▶️ Resumed")
+        else:
+            self.pause_event.set()
+            self.pause_button.config(text="Resume")
+            self.log_message("⏸️ Paused (running videos stop within a few frames)")
+
+    def cancel_tracking(self):
+        self.cancel_event.set()
+        self.pause_event.clear()
+        self.pause_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.log_message("⏹️ Cancelling: running videos stop at their next progress check, queued ones are skipped")
+
+    def stop_workers(self):
+        """Cancel a running batch (running videos stop at their next progress check) and drop queued ones."""
+        if self.batch is not None:
+            self.cancel_event.set()
+            self.pause_event.clear()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """Quit button and window close; without the cancel the app would wait for running videos to finish."""
+        self.stop_workers()
+        self.master.quit()
+
+    def batch_worker(self, video_files, output_folder, log_filename, options):
+        """Runs on a background thread; never touches Tk widgets directly."""
+        from utils.batch import run_batch, start_pool
+        from utils.profiling import profile_path, rollup, format_rollup
+        profile = options['profile']
+        workers_died = False
+        try:
+            with open(log_filename, 'w', encoding="utf-8") as logfile:
+                for video, result, completed, total in run_batch(video_files, output_folder, workers=NUM_WORKERS,
+                                                                 executor=self.pool, **options):
+                    workers_died |= (result['error'] or '').startswith('BrokenProcessPool')
+                    if result['status'] == 'cancelled':
+                        msg = result['message']
+                    else:
+                        msg = f"✅ Completed {os.path.basename(video)}: {result['message']}"
+                    logfile.write(msg + "\n")
+                    logfile.flush()
+                    self.events.put(('result', (video, msg, result['frames']), completed, total))
+
+                if profile:
+                    reports = [profile_path(output_folder, os.path.splitext(os.path.basename(v))[0])
+                               for v in video_files]
+                    msg = "\n⏱️ Stage timings for this batch:\n" + "\n".join(format_rollup(rollup(reports)))
+                    logfile.write(msg + "\n")
+                    self.events.put(('log', msg, 0, 0))
+        except Exception as e:
+            workers_died |= isinstance(e, BrokenProcessPool)
+            self.events.put(('error', f"❌ Batch failed: {e}", 0, 0))
+        if workers_died and self.pool is not None:
+            # A crashed worker breaks the whole pool; replace it for the next batch
+            self.pool.shutdown(wait=False)
+            self.pool = start_pool(NUM_WORKERS)
+        self.events.put(('done', log_filename, len(video_files), len(video_files)))
+
+    def poll_events(self):
+        """Drain worker events on the Tk thread; reschedules itself for the lifetime of the window."""
+        if self.batch is not None:
+            try:
+                while True:
+                    video, done, frame_count = self.progress_queue.get_nowait()
+                    # A late update can arrive after the video's result; finished videos stay finished
+                    if video not in self.batch['finished']:
+                        self.batch['running'][video] = (done, frame_count)
+            except queue.Empty:
+                pass
+
+        try:
+            while True:
+                kind, payload, completed, total = self.events.get_nowait()
+                if kind == 'result':
+                    video, msg, frames = payload
+                    self.batch['running'].pop(video, None)
+                    self.batch['finished'].add(video)
+                    self.batch['completed'] = completed
+                    self.batch['frames_done'] += frames
+                    self.log_message(msg)
+                elif kind in ('log', 'error'):
+                    self.log_message(payload)
+                elif kind == 'done':
+                    self.finish_batch(payload, total)
+                elif kind == 'summary':
+                    self.summary_button.config(state=tk.NORMAL)
+                    if payload:
+                        messagebox.showinfo("Summary Complete", f"Distance summary written to:\n{payload}")
+                    else:
+                        messagebox.showerror("Error", "Could not calculate distance summary.")
+        except queue.Empty:
+            pass
+
+        if self.batch is not None:
+            self.update_progress()
+        self.master.after(100, self.poll_events)
+
+    def update_progress(self):
+        """Overall progress counts running videos by their frame fraction; fps and ETA cover the whole batch."""
+        batch = self.batch
+        running = batch['running']
+        fraction = batch['completed']
+        fraction += sum(done / frame_count for done, frame_count in running.values() if frame_count > 0)
+        fraction /= max(batch['total'], 1)
+        self.progress.set(min(100.0, fraction * 100))
+
+        elapsed = time.perf_counter() - batch['started']
+        frames = batch['frames_done'] + sum(done for done, _ in running.values())
+        fps = frames / elapsed if elapsed > 0 else 0.0
+        eta = elapsed * (1 - fraction) / fraction if fraction > 0 else None
+
+        lines = [f"{batch['completed']}/{batch['total']} videos · {fps:.0f} fps · "
+                 f"ETA {format_duration(eta) if eta is not None else '--:--:--'}"
+                 + (" · paused" if self.pause_event.is_set() else "")]
+        for video, (done, frame_count) in sorted(running.items()):
+            percent = f"{done / frame_count:.0%}" if frame_count > 0 else "?"
+            lines.append(f"  {os.path.basename(video)}: {done}/{frame_count or '?'} frames ({percent})")
+        self.progress_text.set("\n".join(lines))
+
+    def finish_batch(self, log_filename, total):
+        cancelled = self.cancel_event.is_set()
+        self.update_progress()
+        self.batch = None
+        self.start_button.config(state=tk.NORMAL)
+        self.pause_button.config(state=tk.DISABLED, text="Pause")
+        self.cancel_button.config(state=tk.DISABLED)
+        title, verb = ("Cancelled", "Stopped batch of") if cancelled else ("Done", "Processed")
+        messagebox.showinfo(title, f"{verb} {total} video(s).\nLog saved to:\n{log_filename}")
 
-        with open(log_filename, 'w', encoding="utf-8") as logfile:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=batch_size) as executor:
-                for batch_start in range(0, total, batch_size):
-                    batch = video_files[batch_start:batch_start + batch_size]
-                    batch_names = [os.path.basename(v) for v in batch]
-
-                    self.log_message(f"\n▶️ Starting batch: {', '.join(batch_names)}")
-                    logfile.write(f"\n▶️ Starting batch: {', '.join(batch_names)}\n")
+    def run_distance_summary(self):
+        output_dir = self.output_dir.get()
+        if not output_dir:
+            messagebox.showwarning("Missing Output Folder", "Please select the output folder first.")
+            return
 
-                    futures = {executor.submit(process_video, video, output_folder): video for video in batch}
+        self.summary_button.config(state=tk.DISABLED)
+        self.log_message("📏 Calculating distance summary...")
+        threading.Thread(target=self.summary_worker, args=(output_dir,), daemon=True).start()
 
-                    for future in concurrent.futures.as_completed(futures):
-                        video = futures[future]
-                        video_name = os.path.basename(video)
-                        try:
-                            result = future.result()
-                            msg = f"✅ Completed {video_name}: {result}"
-                            self.log_message(msg)
-                            logfile.write(msg + "\n")
-                        except Exception as e:
-                            msg = f"❌ Error with {video_name}: {e}"
-                            self.log_message(msg)
-                            logfile.write(msg + "\n")
+    def summary_worker(self, output_dir):
+        from distance_calculator import calculate_summary
+        try:
+            summary_path = calculate_summary(output_dir)
+        except Exception as e:
+            self.events.put(('log', f"❌ Distance summary failed: {e}", 0, 0))
+            summary_path = None
+        self.events.put(('summary', summary_path, 0, 0))
 
-                    self.log_message(f"✔️ Finished batch: {', '.join(batch_names)}")
-                    logfile.write(f"✔️ Finished batch: {', '.join(batch_names)}\n")
 
-                    self.progress.set(min(100, ((batch_start + len(batch)) / total) * 100))
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
 
-        messagebox.showinfo("Done", f"Processed {len(video_files)} video(s).\nLog saved to:\n{log_filename}")
 
-    def run_distance_summary(self):
-        output_dir = self.output_dir.get()
-        if not output_dir:
-            messagebox.showwarning("Missing Output Folder", "Please select the output folder first.")
-            return
+def report_crash(message):
+    """Show a start-up crash; the released build has no console, so print() and input() reach nobody."""
+    try:
+        root = tk.Tk()
+        root.withdraw()
+        messagebox.showerror("Fish Tracker", message, parent=root)
+        root.destroy()
+    except Exception:
+        # Tk itself failed to start
+        if sys.platform == "win32":
+            import ctypes
+            ctypes.windll.user32.MessageBoxW(None, message, "Fish Tracker", 0x10)
+        elif sys.stderr is not None:
+            print(message, file=sys.stderr)
 
-        summary_path = calculate_summary(output_dir)
-        if summary_path:
-            messagebox.showinfo("Summary Complete", f"Distance summary written to:\n{summary_path}")
-        else:
-            messagebox.showerror("Error", "Could not calculate distance summary.")
 
 # Entry point
 if __name__ == "__main__":
@@ -151,9 +356,10 @@ if __name__ == "__main__":
         root = tk.Tk()
         app = FishTrackerGUI(root)
         root.mainloop()
+        app.stop_workers()
     except Exception as e:
         import traceback
-        with open("gui_crash_log.txt", "w") as f:
+        log_path = os.path.abspath("gui_crash_log.txt")
+        with open(log_path, "w") as f:
             traceback.print_exc(file=f)
-        print("An error occurred. See gui_crash_log.txt for details.")
-        input("Press Enter to exit...")
+        report_crash(f"An error occurred. See {log_path} for details.")
@@ -10,7 +10,12 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=[
+        # Not used by the tracker; pulled in by the build environment otherwise
+        'matplotlib', 'pandas', 'IPython', 'PyQt5', 'PySide2', 'PySide6',
+        # Multi-fish association and parquet output are CLI-only
+        'scipy', 'pyarrow',
+    ],
     noarchive=False,
     optimize=0,
 )
@@ -29,7 +34,7 @@ exe = EXE(
     upx=True,
     upx_exclude=[],
     runtime_tmpdir=None,
-    console=True,
+    console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
     target_arch=None,
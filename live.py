@@ -0,0 +1,48 @@
+import sys
+import argparse
+from tracker_wrapper import get_resource_path, TRACKERS
+from utils.live import LiveTracker
+from utils.options import SearchOptions, SegmentationOptions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Track a live camera, RTSP/pipe stream or (with --realtime) a file replayed at its frame rate. "
+                    "Output rotates into time-windowed CSV/heatmap files; live/<name>.json shows running totals.")
+    parser.add_argument('source', help="camera index (e.g. 0), stream URL or video file")
+    parser.add_argument('-o', '--output', default=get_resource_path("outputs"), help="output folder (default: ./outputs)")
+    parser.add_argument('--name', default=None, help="name for output files and the ROI (default: camera<N> / file name)")
+    parser.add_argument('--tracker', choices=sorted(TRACKERS), default='mog2', help="tracking backend")
+    parser.add_argument('--rotate-minutes', type=float, default=60, help="start new output files every N minutes, aligned to the clock (60: on the hour)")
+    parser.add_argument('--max-latency-ms', type=float, default=500, help="skip frames older than this when picked up")
+    parser.add_argument('--realtime', action='store_true', help="replay a file source at its frame rate")
+    parser.add_argument('--duration', type=float, default=None, help="stop after N seconds")
+    parser.add_argument('--scale', type=float, default=1.0, help="segmentation scale (e.g. 0.5)")
+    parser.add_argument('--predictive', action='store_true', help="Kalman-predicted search window (mog2 only)")
+    parser.add_argument('--show', action='store_true', help="show the annotated preview window")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    source = int(args.source) if args.source.isdigit() else args.source
+    name = args.name or (f"camera{source}" if isinstance(source, int) else None)
+    options = {'segmentation': SegmentationOptions(processing_scale=args.scale), 'show_window': args.show}
+    if args.predictive:
+        options['search'] = SearchOptions()
+
+    tracker = TRACKERS[args.tracker](source, args.output, video_name=name, **options)
+    if not tracker.cap.isOpened():
+        print(f"❌ Could not open source {args.source}")
+        return 1
+    live = LiveTracker(tracker, rotate_s=args.rotate_minutes * 60, max_latency_ms=args.max_latency_ms,
+                       realtime=args.realtime, duration_s=args.duration)
+    print(f"🔴 Tracking {args.source} live. Press Ctrl+C to stop.")
+    status = live.run()
+    print(f"\n✅ Stopped after {status['running_s']} s: {status['frames_processed']} frames processed, "
+          f"{status['frames_dropped']} dropped, {status['distance_cm']} cm. Files: {len(live.files)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
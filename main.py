@@ -1,30 +1,127 @@
-def main():
-    # Safe path resolution for bundled or normal mode
-    video_dir = get_resource_path("videos")
-    output_dir = get_resource_path("outputs")
+import os
+import sys
+import argparse
+from multiprocessing import freeze_support
+from tracker_wrapper import get_resource_path, TRACKERS
+from utils.batch import run_batch, run_sharded, list_videos, default_workers
+from utils.constants import VIDEO_EXTENSIONS
+from utils.formats import available_formats
+from utils.manifest import JobManifest, input_hash
+from utils.options import BackgroundOptions, SearchOptions, SegmentationOptions, StreamOptions, as_params
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Track fish in a folder of videos (headless). Completed, unchanged videos are "
+                    "skipped on re-runs using the job manifest in the output folder.")
+    parser.add_argument('inputs', nargs='*', default=[get_resource_path("videos")],
+                        help="video files and/or folders (default: ./videos)")
+    parser.add_argument('-o', '--output', default=get_resource_path("outputs"), help="output folder (default: ./outputs)")
+    parser.add_argument('-w', '--workers', type=int, default=default_workers(), help="worker processes (default: CPU count)")
+    parser.add_argument('--tracker', choices=sorted(TRACKERS), default='mog2', help="tracking backend")
+    parser.add_argument('--format', choices=available_formats(), default='csv',
+                        help="trajectory output format (parquet needs pyarrow)")
+    parser.add_argument('--shards', type=int, default=1,
+                        help="split each video into N time segments tracked in parallel (long recordings)")
+    parser.add_argument('--frame-stride', type=int, default=1, help="process every Nth frame")
+    parser.add_argument('--scale', type=float, default=1.0, help="segmentation scale (e.g. 0.5)")
+    parser.add_argument('--stream', action='store_true', help="write rows while tracking (bounded memory)")
+    parser.add_argument('--checkpoint-interval', type=int, default=0, help="checkpoint every N frames (0 = off)")
+    parser.add_argument('--pipelined', action='store_true', help="decode on a prefetch thread")
+    parser.add_argument('--max-speed', action='store_true', help="derive timestamps from frame index / fps")
+    parser.add_argument('--multi-fish', action='store_true', help="track every fish and write per-fish columns")
+    parser.add_argument('--max-fish', type=int, default=None, help="upper bound on fish IDs alive at once")
+    parser.add_argument('--predictive', action='store_true', help="Kalman-predicted search window (single fish)")
+    parser.add_argument('--background', choices=('seed', 'static'), default=None,
+                        help="use a cached per-rig median background to seed MOG2 or replace it")
+    parser.add_argument('--camera-id', default=None, help="background cache key (default: the video's folder name)")
+    parser.add_argument('--export-video', action='store_true', help="write annotated/<video>.mp4 for QA review")
+    parser.add_argument('--export-scale', type=float, default=1.0, help="annotated video resize factor (e.g. 0.5)")
+    parser.add_argument('--export-every', type=int, default=1, help="write every Nth processed frame to the annotated video")
+    parser.add_argument('--profile', action='store_true', help="write per-stage timing reports")
+    parser.add_argument('--force', action='store_true', help="re-process videos already marked done")
+    return parser.parse_args(argv)
+
+
+def collect_videos(inputs):
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            videos.extend(list_videos(path))
+        elif path.lower().endswith(VIDEO_EXTENSIONS) and os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"⚠️ Skipping {path}: not a video file or folder")
+    return [os.path.abspath(v) for v in videos]
+
+
+def tracker_options(args):
+    stream = None
+    if args.stream or args.checkpoint_interval > 0:
+        # Checkpointed runs pick up from their last checkpoint when run again
+        stream = StreamOptions(checkpoint_interval=args.checkpoint_interval, resume=args.checkpoint_interval > 0)
+    options = {
+        'frame_stride': args.frame_stride,
+        'segmentation': SegmentationOptions(processing_scale=args.scale),
+        'stream': stream,
+        'pipelined': args.pipelined,
+        'max_speed': args.max_speed,
+        'profile': args.profile,
+        'multi_fish': args.multi_fish,
+        'max_fish': args.max_fish,
+        'search': SearchOptions() if args.predictive else None,
+        'background': BackgroundOptions(args.background, camera_id=args.camera_id) if args.background else None,
+        'export_video': args.export_video,
+        'export_scale': args.export_scale,
+        'export_every': args.export_every,
+    }
+    return options
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output_dir = args.output
 
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
 
-    videos = sorted(
-        [f for f in os.listdir(video_dir) if f.lower().endswith(".mp4")],
-        key=extract_number
-    )
-    video_paths = [os.path.join(video_dir, f) for f in videos]
-    total = len(video_paths)
+    manifest = JobManifest(output_dir)
+    options = tracker_options(args)
+    params = {'tracker': args.tracker, 'format': args.format, **as_params(options)}
+
+    videos = collect_videos(args.inputs)
+    pending, hashes = [], {}
+    for video in videos:
+        hashes[video] = input_hash(video)
+        if not args.force and manifest.is_done(video, hashes[video], params):
+            continue
+        pending.append(video)
 
-    print(f"🎞️ Found {total} videos. Running in batches of {BATCH_SIZE} using {NUM_WORKERS} workers.")
+    skipped = len(videos) - len(pending)
+    parallelism = f"{args.shards} shards per video" if args.shards > 1 else f"{args.workers} workers"
+    print(f"🎞️ Found {len(videos)} videos: {len(pending)} to process, {skipped} already done. "
+          f"Using {parallelism}.")
 
-    batches = list(chunk_list(video_paths, BATCH_SIZE))
+    if args.shards > 1:
+        results = run_sharded(pending, output_dir, args.shards, tracker=args.tracker, output_format=args.format,
+                              **options)
+    else:
+        results = run_batch(pending, output_dir, workers=args.workers, tracker=args.tracker,
+                            output_format=args.format, **options)
 
-    for i, batch in enumerate(batches, 1):
-        print(f"\n🚀 Starting batch {i}/{len(batches)}:")
-        print("   🎬 Videos:", ', '.join([os.path.basename(b) for b in batch]))
+    failures = 0
+    for video, result, completed, total in results:
+        manifest.record(video, status=result['status'], input_hash=hashes[video], params=params,
+                        frames=result['frames'], duration_s=result['duration_s'], fps=result['fps'],
+                        error=result['error'])
+        failures += result['status'] != 'done'
+        fps = f" ({result['fps']} fps)" if result['fps'] else ""
+        print(f"   [{completed}/{total}] {result['message']}{fps}")
 
-        with Pool(processes=NUM_WORKERS) as pool:
-            results = pool.map(partial(process_video, output_dir=output_dir), batch)
+    print(f"\n✅ All videos processed. {failures} failed. Manifest: {manifest.path}")
+    return 1 if failures else 0
 
-        for res in results:
-            print("   " + res)
 
-    print("\n✅ All batches processed.")
+if __name__ == "__main__":
+    freeze_support()
+    sys.exit(main())
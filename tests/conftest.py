@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate
+
+
+@pytest.fixture(scope='session')
+def synthetic_video(tmp_path_factory):
+    """16 s, 640x360 tank video with one fish; ground truth is saved next to it (load_truth)."""
+    path = str(tmp_path_factory.mktemp('videos') / 'tank.mp4')
+    generate(path, width=640, height=360, fps=30, duration_s=16, fish_length=0.08)
+    return path
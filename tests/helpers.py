@@ -0,0 +1,10 @@
+import numpy as np
+
+from benchmarks.synthetic import load_truth
+
+
+def mean_error(video, traj):
+    """Mean centroid distance (px) of a trajectory from the synthetic video's ground truth."""
+    _, cx, cy = load_truth(video)
+    frames = traj['frame']
+    return float(np.hypot(traj['cx'] - cx[frames], traj['cy'] - cy[frames]).mean())
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from utils.association import associate, linear_sum_assignment
+from utils.tracker import FishTracker
+from utils.trajectory import DETECTED, INTERPOLATED, Trajectory, read_multi_csv, write_multi_csv
+
+METHODS = ['greedy', 'hungarian']
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_associate_matches_nearest_within_gate(method):
+    matches, lost, new = associate([(0, 0), (100, 0)], [(103, 4), (2, 1), (400, 400)], gate=50, method=method)
+    assert sorted(matches) == [(0, 1), (1, 0)]
+    assert lost == [] and new == [2]
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_associate_empty_and_out_of_gate(method):
+    assert associate([], [(1, 1)], gate=10, method=method) == ([], [], [0])
+    assert associate([(1, 1)], [], gate=10, method=method) == ([], [0], [])
+    assert associate([(0, 0)], [(11, 0)], gate=10, method=method) == ([], [0], [0])
+
+
+def test_hungarian_is_optimal_where_greedy_is_not():
+    if linear_sum_assignment is None:
+        pytest.skip("scipy is not installed")
+    tracks, detections = [(0, 0), (10, 0)], [(9, 0), (19, 0)]
+    # Greedy takes the closest pair (track 1, detection 0) and strands track 0
+    assert associate(tracks, detections, gate=12, method='greedy')[0] == [(1, 0)]
+    assert sorted(associate(tracks, detections, gate=12, method='hungarian')[0]) == [(0, 0), (1, 1)]
+
+
+def box(cx, cy, size=20):
+    return (cx - size // 2, cy - size // 2, size, size)
+
+
+def run_tracks(tracker, frames):
+    """Feed per-frame detection lists to the multi-fish association, as process_frame does."""
+    for index, bboxes in enumerate(frames):
+        tracker.frame_index = index
+        tracker.frame_ms = index * 1000 / 30
+        tracker.update_tracks(bboxes)
+    return tracker.fish_trajectories
+
+
+@pytest.fixture
+def multi_tracker(synthetic_video, tmp_path):
+    def make(**options):
+        tracker = FishTracker(synthetic_video, str(tmp_path), multi_fish=True, **options)
+        tracker.cap.release()
+        return tracker
+    return make
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_ids_follow_crossing_fish(multi_tracker, method):
+    # Two fish swim past each other 30 px apart, 10 px per frame
+    frames = [[box(100 + 10 * i, 150), box(500 - 10 * i, 180)] for i in range(41)]
+    tracks = run_tracks(multi_tracker(association=method), frames)
+    assert sorted(tracks) == [1, 2]
+    for fish_id, start, step in ((1, 100, 10), (2, 500, -10)):
+        traj = tracks[fish_id]
+        # Rows from before the fish was confirmed are filled in
+        np.testing.assert_array_equal(traj['frame'], np.arange(41))
+        np.testing.assert_array_equal(traj['cx'], start + step * np.arange(41))
+
+
+def test_noise_blobs_do_not_get_ids(multi_tracker):
+    tracker = multi_tracker()
+    frames = [[box(100 + 5 * i, 100)] + ([box(400, 300)] if i % 5 == 0 else []) for i in range(20)]
+    tracks = run_tracks(tracker, frames)
+    assert list(tracks) == [1] and len(tracks[1]) == 20
+
+
+def test_max_fish_limits_ids(multi_tracker):
+    frames = [[box(100, 100), box(300, 100), box(500, 100)] for _ in range(10)]
+    tracks = run_tracks(multi_tracker(max_fish=2), frames)
+    assert sorted(tracks) == [1, 2]
+    assert all(len(traj) == 10 for traj in tracks.values())
+
+
+def test_jump_beyond_gate_starts_a_new_fish(multi_tracker):
+    tracker = multi_tracker(gate_distance=50)
+    tracker.max_no_movement_frames = 3
+    frames = [[box(100, 100)]] * 5 + [[box(300, 100)]] * 10
+    tracks = run_tracks(tracker, frames)
+    assert sorted(tracks) == [1, 2]
+    # The first fish holds its last position until max_no_movement_frames runs out
+    assert tracks[1]['detected'].tolist() == [DETECTED] * 5 + [INTERPOLATED] * 3
+    assert tracks[2]['frame'].tolist() == list(range(5, 15))
+
+
+def test_single_fish_video_gets_one_id(synthetic_video, tmp_path):
+    tracker = FishTracker(synthetic_video, str(tmp_path), multi_fish=True)
+    tracker.run()
+    assert list(tracker.fish_trajectories) == [1]
+
+
+def trajectory(frames, offset):
+    traj = Trajectory()
+    for frame in frames:
+        traj.append(frame, frame * 33, frame + offset, 2 * frame, box(frame + offset, 2 * frame),
+                    INTERPOLATED if frame % 4 == 0 else DETECTED)
+    return traj
+
+
+def test_multi_csv_round_trip(tmp_path):
+    # Fish 3 appears later and fish 1 has a gap, so rows have empty cells
+    tracks = {1: trajectory([0, 1, 2, 6, 7], 10), 3: trajectory(range(4, 9), 500)}
+    path = str(tmp_path / 'tank.csv')
+    write_multi_csv(path, tracks)
+    loaded = read_multi_csv(path)
+    assert sorted(loaded) == [1, 3]
+    for fish_id, traj in tracks.items():
+        for name in ('frame', 't_ms', 'cx', 'cy', 'detected'):
+            np.testing.assert_array_equal(loaded[fish_id][name], traj[name])
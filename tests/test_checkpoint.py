@@ -0,0 +1,123 @@
+import os
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from helpers import mean_error
+from utils.formats import read_trajectory
+from utils.options import BackgroundOptions, StreamOptions
+from utils.streaming import checkpoint_base, load_checkpoint, remove_checkpoint, save_checkpoint
+from utils.tracker import FishTracker
+
+
+class Crash(Exception):
+    pass
+
+
+def crash_after(frames):
+    def progress(done, total):
+        if done > frames:
+            raise Crash
+    return progress
+
+
+def track(video, output_dir, **options):
+    tracker = FishTracker(video, str(output_dir), **options)
+    tracker.run()
+    tracker.save_results()
+    return tracker, read_trajectory(tracker.csv_path)
+
+
+def test_save_replaces_previous_files(tmp_path):
+    base = checkpoint_base(str(tmp_path), 'tank')
+    for i in range(3):
+        save_checkpoint(base, {'next_frame': i}, np.full((2, 2), i))
+    state, counts = load_checkpoint(base)
+    assert state['next_frame'] == 2
+    np.testing.assert_array_equal(counts, np.full((2, 2), 2))
+    assert sorted(os.listdir(tmp_path / 'checkpoints')) == ['tank.json', state['heatmap_file']]
+
+
+def test_interrupted_save_keeps_previous_checkpoint(tmp_path):
+    base = checkpoint_base(str(tmp_path), 'tank')
+    save_checkpoint(base, {'next_frame': 60}, heatmap_counts=np.ones((2, 2)))
+    # A crash after the next checkpoint's files were written but before its JSON
+    (tmp_path / 'checkpoints' / 'tank_2_heatmap.npy').write_bytes(b'\x93NUMPY')
+    state, counts = load_checkpoint(base)
+    assert state['next_frame'] == 60
+    np.testing.assert_array_equal(counts, np.ones((2, 2)))
+
+
+def test_unreadable_checkpoint_is_ignored(tmp_path):
+    base = checkpoint_base(str(tmp_path), 'tank')
+    save_checkpoint(base, {'next_frame': 60}, heatmap_counts=np.ones((2, 2)))
+    state, _ = load_checkpoint(base)
+    (tmp_path / 'checkpoints' / state['heatmap_file']).write_bytes(b'\x93NUMPY')
+    assert load_checkpoint(base) is None
+
+
+def test_remove_leaves_other_videos(tmp_path):
+    base = checkpoint_base(str(tmp_path), 'tank')
+    other = checkpoint_base(str(tmp_path), 'tank_2')
+    save_checkpoint(other, {'next_frame': 1}, heatmap_counts=np.ones(2))
+    save_checkpoint(base, {'next_frame': 1}, heatmap_counts=np.ones(2))
+    (tmp_path / 'checkpoints' / 'tank_7_heatmap.npy').write_bytes(b'')  # left by an interrupted save
+    remove_checkpoint(base)
+    assert sorted(os.listdir(tmp_path / 'checkpoints')) == ['tank_2.json', 'tank_2_1_heatmap.npy']
+
+
+@pytest.mark.parametrize('stride', [1, 3])
+def test_resume_after_crash(tmp_path, synthetic_video, stride):
+    # A rig-seeded model keeps the uninterrupted run accurate, so resume errors stand out
+    _, full = track(synthetic_video, tmp_path / 'full', stream=StreamOptions(), frame_stride=stride,
+                    background=BackgroundOptions())
+
+    stream = StreamOptions(checkpoint_interval=60, resume_warmup_frames=60)
+    options = {'frame_stride': stride, 'background': BackgroundOptions()}
+    crashed = FishTracker(synthetic_video, str(tmp_path / 'resumed'), progress=crash_after(300),
+                          progress_interval=10, stream=stream, **options)
+    with pytest.raises(Crash):
+        crashed.run()
+    assert crashed.writer.file.closed
+    state, _ = load_checkpoint(crashed.checkpoint_path)
+    assert state['next_frame'] >= 240
+
+    resumed, traj = track(synthetic_video, tmp_path / 'resumed', stream=replace(stream, resume=True), **options)
+    # Rows before the checkpoint are kept as written; none are lost or repeated at the resume point
+    before = full['frame'] < state['next_frame']
+    for name in ('frame', 'cx', 'cy'):
+        np.testing.assert_array_equal(traj[name][:before.sum()], full[name][before])
+    assert np.all(np.diff(traj['frame']) > 0) and np.all(traj['frame'] % stride == 0)
+    assert traj['frame'][before.sum():].min() >= state['next_frame']
+    # The restored heatmap plus the rows added after resuming count every row once
+    assert resumed.writer.heatmap.counts.sum() == len(traj)
+    assert mean_error(synthetic_video, traj) <= mean_error(synthetic_video, full) + 0.5
+    assert os.listdir(tmp_path / 'resumed' / 'checkpoints') == []
+
+
+def test_resume_checkpoints_on_the_interval(tmp_path, synthetic_video):
+    stream = StreamOptions(checkpoint_interval=60)
+    with pytest.raises(Crash):
+        FishTracker(synthetic_video, str(tmp_path), progress=crash_after(130), progress_interval=10,
+                    stream=stream).run()
+    state, _ = load_checkpoint(checkpoint_base(str(tmp_path), 'tank'))
+    assert state['next_frame'] == 120
+
+    with pytest.raises(Crash):
+        FishTracker(synthetic_video, str(tmp_path), progress=crash_after(190), progress_interval=10,
+                    stream=replace(stream, resume=True)).run()
+    # The next checkpoint is the one due at frame 180, not one on the first resumed frame
+    resumed, _ = load_checkpoint(checkpoint_base(str(tmp_path), 'tank'))
+    assert resumed['next_frame'] == 180 and resumed['sequence'] == state['sequence'] + 1
+
+
+def test_resume_with_unusable_checkpoint_starts_fresh(tmp_path, synthetic_video):
+    _, full = track(synthetic_video, tmp_path / 'full', stream=StreamOptions(), end_frame=120)
+    base = checkpoint_base(str(tmp_path / 'resumed'), 'tank')
+    save_checkpoint(base, {'next_frame': 60}, heatmap_counts=np.ones((2, 2)))
+    os.remove(os.path.join(os.path.dirname(base), load_checkpoint(base)[0]['heatmap_file']))
+
+    _, traj = track(synthetic_video, tmp_path / 'resumed', stream=StreamOptions(resume=True), end_frame=120)
+    for name in ('frame', 'cx', 'cy'):
+        np.testing.assert_array_equal(traj[name], full[name])
@@ -0,0 +1,102 @@
+import csv
+
+import numpy as np
+import pytest
+
+from distance_calculator import calculate_summary
+from utils.kinematics import immobility_bouts, kinematics, pixel_scale, resample_indices, summarize, time_in_zone
+from utils.metadata import write_metadata
+from utils.trajectory import Trajectory, write_multi_csv
+
+# One sample per second: 3 cm right, three seconds still, 3 cm right again (at 0.5 cm/px in X)
+T_MS = [0, 1000, 2000, 3000, 4000, 5000]
+CX = [0, 6, 6, 6, 6, 12]
+CY = [0] * 6
+SCALE = (0.5, 0.25)
+
+
+def make_trajectory(cx, cy, t_ms):
+    traj = Trajectory()
+    for i, (x, y, t) in enumerate(zip(cx, cy, t_ms)):
+        traj.append(i, t, x, y, (x - 5, y - 5, 10, 10))
+    return traj
+
+
+def test_pixel_scale_is_per_axis():
+    assert pixel_scale(640, 360, 28, 14) == (28 / 640, 14 / 360)
+
+
+def test_resample_indices():
+    t_ms = [0, 40, 990, 1000, 1999, 2500, 4100]
+    np.testing.assert_array_equal(resample_indices(t_ms, every_ms=1000), [0, 3, 5, 6])
+    np.testing.assert_array_equal(resample_indices(t_ms, frame_skip=3), [0, 3, 6])
+
+
+def test_kinematics_steps_and_speeds():
+    k = kinematics(T_MS, CX, CY, SCALE)
+    np.testing.assert_allclose(k['x_cm'], [0, 3, 3, 3, 3, 6])
+    np.testing.assert_allclose(k['step_cm'], [3, 0, 0, 0, 3])
+    np.testing.assert_allclose(k['speed_cm_s'], [3, 0, 0, 0, 3])
+    np.testing.assert_allclose(k['accel_cm_s2'], [-3, 0, 0, 3])
+    # Y is calibrated with its own scale
+    np.testing.assert_allclose(kinematics([0, 1000], [0, 0], [0, 8], SCALE)['step_cm'], [2])
+
+
+def test_repeated_timestamp_has_zero_speed():
+    k = kinematics([0, 1000, 1000], [0, 2, 4], [0, 0, 0], (1, 1))
+    np.testing.assert_allclose(k['speed_cm_s'], [2, 0])
+
+
+def test_time_in_zone_counts_each_step_at_its_start():
+    k = kinematics(T_MS, CX, CY, SCALE)
+    assert time_in_zone(k, (2.5, -1, 3.5, 1)) == pytest.approx(4.0)
+    assert time_in_zone(k, (10, 10, 20, 20)) == 0.0
+
+
+def test_immobility_bouts():
+    k = kinematics(T_MS, CX, CY, SCALE)
+    np.testing.assert_allclose(immobility_bouts(k), [[1.0, 4.0]])
+    assert immobility_bouts(k, min_duration_s=3.5).shape == (0, 2)
+    assert immobility_bouts(k, speed_threshold_cm_s=5).tolist() == [[0.0, 5.0]]
+
+
+def test_summarize():
+    summary = summarize(kinematics(T_MS, CX, CY, SCALE), zone=(2.5, -1, 3.5, 1))
+    assert summary == pytest.approx({
+        'total_distance_cm': 6.0, 'duration_s': 5.0, 'mean_speed_cm_s': 1.2, 'max_speed_cm_s': 3.0,
+        'immobile_time_s': 3.0, 'immobility_bouts': 1, 'time_in_zone_s': 4.0,
+    })
+    empty = summarize(kinematics([], [], [], SCALE))
+    assert empty['total_distance_cm'] == 0.0 and empty['duration_s'] == 0.0 and empty['immobility_bouts'] == 0
+
+
+def read_summary(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def test_summary_columns(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    # 100x50 px frame of a 28x14 cm tank: 0.28 cm/px on both axes
+    make_trajectory([0, 50, 50, 50, 50, 100], CY, T_MS).write_csv(str(data_dir / 'tank.csv'))
+    write_metadata(str(tmp_path), 'tank', {'width': 100, 'height': 50, 'tracker': {'multi_fish': False}})
+
+    expected = [['Video', 'Total Distance (cm)', 'Duration (s)', 'Mean Speed (cm/s)', 'Max Speed (cm/s)',
+                 'Immobile Time (s)', 'Immobility Bouts'],
+                ['tank', '28.00', '5.00', '5.60', '14.00', '3.00', '1']]
+    assert read_summary(calculate_summary(str(tmp_path), workers=1, resample_ms=1000)) == expected
+    # Second run comes from the cache
+    assert read_summary(calculate_summary(str(tmp_path), workers=1, resample_ms=1000)) == expected
+
+
+def test_summary_messages_name_the_file(tmp_path, capsys):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    csv_path = str(data_dir / 'tank.csv')
+    write_multi_csv(csv_path, {1: make_trajectory(CX, CY, T_MS), 2: make_trajectory([5], [5], [0])})
+    write_metadata(str(tmp_path), 'tank', {'width': 100, 'height': 50, 'tracker': {'multi_fish': True}})
+
+    rows = read_summary(calculate_summary(str(tmp_path), workers=1, resample_ms=1000))
+    assert [row[0] for row in rows[1:]] == ['tank_fish1', 'tank_fish2']
+    assert f"Not enough points in {csv_path} (fish 2)" in capsys.readouterr().out
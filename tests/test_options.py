@@ -0,0 +1,43 @@
+import pytest
+
+import utils.tracker
+from utils.options import BackgroundOptions, SearchOptions, SegmentationOptions, StreamOptions, as_params
+from utils.simple_tracker import SimpleFishTracker
+from utils.tracker import FishTracker
+
+
+@pytest.fixture
+def no_capture(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the video was opened")
+    monkeypatch.setattr(utils.tracker.cv2, 'VideoCapture', fail)
+
+
+@pytest.mark.parametrize('options, message', [
+    ({'multi_fish': True, 'search': SearchOptions()}, 'predictive search'),
+    ({'multi_fish': True, 'stream': StreamOptions()}, 'streaming output'),
+    ({'multi_fish': True, 'output_format': 'npz'}, 'only writes CSV'),
+    ({'start_frame': 30, 'stream': StreamOptions(checkpoint_interval=60)}, 'start_frame'),
+    ({'output_format': 'xlsx'}, 'Output format'),
+])
+def test_invalid_options_are_rejected_before_opening_the_video(tmp_path, no_capture, options, message):
+    with pytest.raises(ValueError, match=message):
+        FishTracker('tank.mp4', str(tmp_path), **options)
+
+
+def test_simple_tracker_rejects_mog2_options_before_opening_the_video(tmp_path, no_capture):
+    with pytest.raises(ValueError, match='simple tracker'):
+        SimpleFishTracker('tank.mp4', str(tmp_path), search=SearchOptions())
+
+
+def test_option_groups_validate_and_serialize():
+    with pytest.raises(ValueError):
+        SearchOptions(margin=0)
+    with pytest.raises(ValueError, match='background mode'):
+        BackgroundOptions('dynamic')
+    with pytest.raises(ValueError):
+        SegmentationOptions(processing_scale=0)
+    with pytest.raises(ValueError):
+        StreamOptions(chunk_size=0)
+    assert SegmentationOptions(roi=[10, 20, 300, 200]).roi == (10, 20, 300, 200)
+    assert as_params({'search': SearchOptions(), 'frame_stride': 2}) == {'search': {'margin': 3.0}, 'frame_stride': 2}
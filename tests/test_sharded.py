@@ -0,0 +1,86 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from helpers import mean_error
+from tracker_wrapper import segment_bounds, track_video_sharded
+from utils.formats import read_trajectory
+from utils.options import BackgroundOptions
+from utils.metadata import read_metadata
+from utils.tracker import FishTracker
+
+# Long enough for a segment's MOG2 model to converge before its first logged frame
+WARMUP_S = 5
+SHARDS = 3
+
+
+def output_files(output_dir):
+    return sorted(os.path.relpath(os.path.join(folder, name), output_dir)
+                  for folder, _, names in os.walk(output_dir) for name in names)
+
+
+@pytest.mark.parametrize('frame_count, shards, stride', [(480, 3, 1), (480, 4, 3), (7, 3, 1), (10, 4, 4)])
+def test_segment_bounds_cover_every_frame_once(frame_count, shards, stride):
+    bounds = segment_bounds(frame_count, shards, stride)
+    assert bounds[0][0] == 0 and bounds[-1][1] is None
+    for (start, end), (next_start, _) in zip(bounds, bounds[1:]):
+        assert start < end == next_start and start % stride == 0
+
+
+@pytest.fixture(scope='module')
+def single_pass(synthetic_video, tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp('single')
+    tracker = FishTracker(synthetic_video, str(output_dir), show_window=False, background=BackgroundOptions(),
+                          profile=True)
+    tracker.run()
+    tracker.save_results()
+    return output_dir, tracker
+
+
+@pytest.fixture(scope='module')
+def sharded(synthetic_video, tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp('sharded')
+    result = track_video_sharded(synthetic_video, str(output_dir), shards=SHARDS, warmup_s=WARMUP_S,
+                                 background=BackgroundOptions(), profile=True)
+    assert result['status'] == 'done', result['message']
+    return output_dir, result
+
+
+def test_sharded_matches_single_pass(synthetic_video, single_pass, sharded):
+    single_dir, tracker = single_pass
+    sharded_dir, result = sharded
+    assert output_files(sharded_dir) == output_files(single_dir)
+    assert result['frames'] == tracker.frame_index + 1
+
+    traj = read_trajectory(tracker.trajectory_path.replace(str(single_dir), str(sharded_dir)))
+    frames = traj['frame']
+    assert np.all(np.diff(frames) > 0)
+    bounds = segment_bounds(tracker.frame_count, SHARDS)
+    for start, end in bounds:
+        assert np.any((frames >= start) & (frames < (end or tracker.frame_count)))
+
+    # The first segment tracks exactly what the single pass does
+    full = read_trajectory(tracker.trajectory_path)
+    first_end = bounds[0][1]
+    head = frames < first_end
+    np.testing.assert_array_equal(frames[head], full['frame'][full['frame'] < first_end])
+    np.testing.assert_allclose(traj['cx'][head], full['cx'][full['frame'] < first_end])
+    # Later segments start from a model that has only seen the warm-up, so their frames
+    # differ near the cuts; the accuracy must not
+    assert mean_error(synthetic_video, traj) <= mean_error(synthetic_video, full) + 1.0
+
+
+def test_sharded_metadata_and_profile(single_pass, sharded):
+    single_dir, tracker = single_pass
+    sharded_dir, _ = sharded
+    video_name = os.path.splitext(os.path.basename(tracker.video_path))[0]
+    assert read_metadata(str(sharded_dir), video_name) == read_metadata(str(single_dir), video_name)
+
+    single = tracker.profiler.report()['stages']
+    with open(os.path.join(sharded_dir, 'profiles', f"{video_name}.json"), encoding='utf-8') as f:
+        stages = json.load(f)['stages']
+    # Every segment after the first decodes its warm-up frames on top of its own
+    warmup_frames = WARMUP_S * tracker.fps
+    assert stages['decode']['count'] >= single['decode']['count'] + (SHARDS - 1) * warmup_frames
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from utils.formats import available_formats, read_trajectory, read_trajectory_metadata, write_trajectory
+from utils.trajectory import COLUMNS, INTERPOLATED, Trajectory, format_time
+
+
+def sample_trajectory(rows=50):
+    traj = Trajectory(capacity=4)  # small, so appending has to grow it
+    for i in range(rows):
+        traj.append(i * 2, i * 67, 100 + i, 50 + i % 7, (90 + i, 40, 20 + i % 3, 10), INTERPOLATED if i % 5 else 1)
+    return traj
+
+
+def assert_same(a, b):
+    assert len(a) == len(b)
+    for name, dtype in COLUMNS:
+        assert b[name].dtype == dtype
+        np.testing.assert_array_equal(a[name], b[name])
+
+
+def test_append_grows_and_extend_matches():
+    traj = sample_trajectory()
+    assert len(traj) == 50 and traj.capacity >= 50
+    copy = Trajectory()
+    copy.extend(**{name: traj[name] for name, _ in COLUMNS})
+    assert_same(traj, copy)
+    np.testing.assert_array_equal(traj.positions(), np.column_stack((traj['cx'], traj['cy'])))
+
+
+@pytest.mark.parametrize('fmt', available_formats())
+def test_format_round_trip(tmp_path, fmt):
+    traj = sample_trajectory()
+    metadata = {'video': 'tank.mp4', 'fps': 30.0}
+    path = write_trajectory(str(tmp_path / f'tank.{fmt}'), traj, metadata)
+    assert_same(traj, read_trajectory(path))
+    if fmt in ('npz', 'parquet'):
+        assert read_trajectory_metadata(path) == metadata
+
+
+def test_empty_csv_round_trip(tmp_path):
+    path = write_trajectory(str(tmp_path / 'empty.csv'), Trajectory())
+    assert len(read_trajectory(path)) == 0
+
+
+def test_legacy_csv(tmp_path):
+    # Layout written by the original tracker: time string and centroid only
+    path = tmp_path / 'legacy.csv'
+    path.write_text("Time_hh:mm:ss:ms,Centroid_X,Centroid_Y\n"
+                    f"{format_time(0)},10,20\n"
+                    f"{format_time(3_723_045)},11,21\n"
+                    "not-a-time,12,22\n"
+                    f"{format_time(3_723_078)},13,23\n")
+    traj = read_trajectory(str(path))
+    np.testing.assert_array_equal(traj['t_ms'], [0, 3_723_045, 3_723_078])
+    np.testing.assert_array_equal(traj['cx'], [10, 11, 13])
+    np.testing.assert_array_equal(traj['cy'], [20, 21, 23])
+    np.testing.assert_array_equal(traj['frame'], [0, 1, 3])  # row number of the valid rows
+    np.testing.assert_array_equal(traj['detected'], [1, 1, 1])
@@ -1,6 +1,15 @@
 import os
 import sys
+import time
+import concurrent.futures
 from utils.tracker import FishTracker
+from utils.simple_tracker import SimpleFishTracker
+
+# Tracker backends selectable by name from the CLI and batch scheduler
+TRACKERS = {
+    'mog2': FishTracker,
+    'simple': SimpleFishTracker,
+}
 
 def get_resource_path(relative_path):
     """ Get absolute path to resource, works for PyInstaller and normal run """
@@ -10,15 +19,160 @@ def get_resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def process_video(video_path, output_dir):
+def track_video(video_path, output_dir, tracker='mog2', progress_queue=None, **tracker_options):
+    """
+    Track one video and report how it went.
+
+    Args:
+        progress_queue: Optional queue receiving (video_path, frames_done, frame_count) while tracking.
+        tracker_options: Passed to the tracker; `cancel` and `pause` are Event-like flags.
+
+    Returns:
+        Dict with status ('done', 'cancelled' or 'failed'), message, frames, duration_s, fps and error.
+    """
+    name = os.path.basename(video_path)
+    started = time.perf_counter()
+    cancel = tracker_options.get('cancel')
+    if cancel is not None and cancel.is_set():
+        return {'status': 'cancelled', 'message': f"⏹️ Cancelled: {name}",
+                'frames': 0, 'duration_s': 0.0, 'fps': None, 'error': None}
+    if progress_queue is not None:
+        tracker_options['progress'] = lambda done, total, video=video_path: progress_queue.put((video, done, total))
     try:
         # Convert to absolute resource-safe paths
         video_path = get_resource_path(video_path)
         output_dir = get_resource_path(output_dir)
 
-        tracker = FishTracker(video_path, output_dir, show_window=False)
-        tracker.run()
-        tracker.save_results()
-        return f"✅ Success: {os.path.basename(video_path)}"
+        engine = TRACKERS[tracker](video_path, output_dir, show_window=False, **tracker_options)
+        engine.run()
+        if engine.cancelled:
+            # Partial output is left as is; a checkpoint (if enabled) lets the next run resume
+            if engine.writer is not None:
+                engine.writer.close()
+            return {'status': 'cancelled', 'message': f"⏹️ Cancelled: {name}",
+                    'frames': engine.frame_index + 1, 'duration_s': round(time.perf_counter() - started, 3),
+                    'fps': None, 'error': None}
+        if engine.frame_index < 0:
+            raise RuntimeError("no frames could be decoded")
+        engine.save_results()
+        duration = time.perf_counter() - started
+        frames = engine.frame_index + 1
+        return {
+            'status': 'done',
+            'message': f"✅ Success: {name}",
+            'frames': frames,
+            'duration_s': round(duration, 3),
+            'fps': round(frames / duration, 2) if duration else None,
+            'error': None,
+        }
+    except Exception as e:
+        return {
+            'status': 'failed',
+            'message': f"❌ Failed: {name} with error: {e}",
+            'frames': 0,
+            'duration_s': round(time.perf_counter() - started, 3),
+            'fps': None,
+            'error': repr(e),
+        }
+
+def segment_bounds(frame_count, shards, stride=1):
+    """[(start, end), ...] splitting `frame_count` frames into `shards` stride-aligned segments; the last end is None."""
+    starts = sorted({int(frame_count * i / shards) // stride * stride for i in range(shards)})
+    return [(start, end) for start, end in zip(starts, starts[1:] + [None])]
+
+
+def _track_segment(job):
+    """
+    Worker: track one segment. Returns its trajectory columns, last frame, last frame index,
+    whether it was cancelled and its raw profiler stages (None when profiling is off).
+    """
+    video_path, output_dir, tracker, start, end, warmup_frames, tracker_options = job
+    engine = TRACKERS[tracker](video_path, output_dir, show_window=False, start_frame=start, end_frame=end,
+                               warmup_frames=warmup_frames, **tracker_options)
+    engine.run()
+    traj = engine.trajectory
+    columns = {name: traj[name].copy() for name in ('frame', 't_ms', 'cx', 'cy', 'x', 'y', 'w', 'h', 'detected')}
+    # Stopping at `end` leaves frame_index on the first frame of the next segment
+    last_index = engine.frame_index if end is None else min(engine.frame_index, end - 1)
+    stages = engine.profiler.stages if engine.profiler.enabled else None
+    return columns, engine.valid_frame, last_index, engine.cancelled, stages
+
+
+def track_video_sharded(video_path, output_dir, shards=None, warmup_s=20.0, tracker='mog2', **tracker_options):
+    """
+    Track one long video as `shards` time segments in parallel processes and stitch the results.
+
+    Each segment starts tracking `warmup_s` seconds before its first frame so the background
+    model and the tracking state have converged; those warm-up frames belong to the previous
+    segment and are not logged twice. The stitched trajectory is saved through the tracker's
+    normal save_results (CSV or binary format, heatmap, metadata).
+
+    Returns:
+        The same result dict as track_video.
+    """
+    name = os.path.basename(video_path)
+    started = time.perf_counter()
+    shards = shards or os.cpu_count() or 1
+    tracker_options.pop('progress_queue', None)
+    try:
+        for option in ('multi_fish', 'stream', 'export_video'):
+            if tracker_options.get(option):
+                raise ValueError(f"{option} is not supported in sharded mode")
+        video_path = get_resource_path(video_path)
+        output_dir = get_resource_path(output_dir)
+
+        engine = TRACKERS[tracker](video_path, output_dir, show_window=False, **tracker_options)
+        engine.cap.release()
+        warmup_frames = int(round(warmup_s * engine.fps))
+        jobs = [(video_path, output_dir, tracker, start, end, warmup_frames, tracker_options)
+                for start, end in segment_bounds(engine.frame_count, shards, engine.frame_stride)]
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(shards, len(jobs))) as executor:
+            segments = list(executor.map(_track_segment, jobs))
+
+        if any(cancelled for _, _, _, cancelled, _ in segments):
+            return {'status': 'cancelled', 'message': f"⏹️ Cancelled: {name}",
+                    'frames': 0, 'duration_s': round(time.perf_counter() - started, 3), 'fps': None, 'error': None}
+        for columns, valid_frame, last_index, _, stages in segments:
+            if len(columns['frame']):
+                engine.trajectory.extend(**columns)
+            if valid_frame is not None:
+                engine.valid_frame, engine.frame_index = valid_frame, last_index
+            if stages:
+                engine.profiler.merge(stages)
+        if engine.frame_index < 0:
+            raise RuntimeError("no frames could be decoded")
+        # The segments built the rig background; loading it from the cache here lets the
+        # metadata describe what they used
+        engine.prepare_background()
+        engine.save_results()
+
+        duration = time.perf_counter() - started
+        frames = engine.frame_index + 1
+        return {
+            'status': 'done',
+            'message': f"✅ Success: {name} ({len(jobs)} segments)",
+            'frames': frames,
+            'duration_s': round(duration, 3),
+            'fps': round(frames / duration, 2) if duration else None,
+            'error': None,
+        }
     except Exception as e:
-        return f"❌ Failed: {os.path.basename(video_path)} with error: {e}"
+        return {
+            'status': 'failed',
+            'message': f"❌ Failed: {name} with error: {e}",
+            'frames': 0,
+            'duration_s': round(time.perf_counter() - started, 3),
+            'fps': None,
+            'error': repr(e),
+        }
+
+
+def process_video(video_path, output_dir, shards=None, **tracker_options):
+    """
+    Track one video; `tracker_options` select the backend (tracker='simple') and are passed through to it.
+    With shards > 1 the video is split into time segments tracked in parallel (see track_video_sharded).
+    """
+    if shards and shards > 1:
+        return track_video_sharded(video_path, output_dir, shards=shards, **tracker_options)['message']
+    return track_video(video_path, output_dir, **tracker_options)['message']
@@ -0,0 +1,54 @@
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy is optional; greedy matching is used without it
+    linear_sum_assignment = None
+
+
+def associate(track_xy, detection_xy, gate, method='greedy'):
+    """
+    Match existing tracks to new detections.
+
+    Args:
+        track_xy: (T, 2) last known track positions.
+        detection_xy: (D, 2) detection centroids.
+        gate: Maximum distance (px) for a match.
+        method: 'greedy' (nearest pairs first) or 'hungarian' (optimal; needs scipy,
+            falls back to greedy without it).
+
+    Returns:
+        (matches, unmatched_tracks, unmatched_detections) where matches is a list of
+        (track_index, detection_index).
+    """
+    track_xy = np.asarray(track_xy, dtype=np.float64).reshape(-1, 2)
+    detection_xy = np.asarray(detection_xy, dtype=np.float64).reshape(-1, 2)
+    n_tracks, n_dets = len(track_xy), len(detection_xy)
+    if not n_tracks or not n_dets:
+        return [], list(range(n_tracks)), list(range(n_dets))
+
+    diff = track_xy[:, None, :] - detection_xy[None, :, :]
+    dist = np.hypot(diff[..., 0], diff[..., 1])
+
+    if method == 'hungarian' and linear_sum_assignment is not None:
+        cost = np.where(dist <= gate, dist, gate * 1e6)
+        rows, cols = linear_sum_assignment(cost)
+        matches = [(r, c) for r, c in zip(rows.tolist(), cols.tolist()) if dist[r, c] <= gate]
+    else:
+        # Only gated pairs are considered, sorted once; each track/detection is used at most once
+        rows, cols = np.nonzero(dist <= gate)
+        order = np.argsort(dist[rows, cols], kind='stable')
+        used_tracks = np.zeros(n_tracks, dtype=bool)
+        used_dets = np.zeros(n_dets, dtype=bool)
+        matches = []
+        for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+            if used_tracks[r] or used_dets[c]:
+                continue
+            used_tracks[r] = used_dets[c] = True
+            matches.append((r, c))
+
+    matched_tracks = {r for r, _ in matches}
+    matched_dets = {c for _, c in matches}
+    return (matches,
+            [t for t in range(n_tracks) if t not in matched_tracks],
+            [d for d in range(n_dets) if d not in matched_dets])
@@ -0,0 +1,103 @@
+import os
+import time
+import cv2
+import numpy as np
+
+# Building takes seconds; a lock this old was left by a worker that died while building
+STALE_LOCK_S = 600
+LOCK_POLL_S = 0.5
+
+
+def default_camera_id(video_path):
+    """Videos from one rig usually share a folder, so the folder name identifies the camera."""
+    return os.path.basename(os.path.dirname(os.path.abspath(video_path))) or 'default'
+
+
+def rig_videos(video_path):
+    """Videos recorded alongside `video_path`: same folder, same container."""
+    folder = os.path.dirname(os.path.abspath(video_path))
+    extension = os.path.splitext(video_path)[1].lower()
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(extension))
+
+
+def background_cache_path(cache_dir, camera_id, frame_size):
+    width, height = frame_size
+    return os.path.join(cache_dir, f"{camera_id}_{width}x{height}.png")
+
+
+def median_background(video_paths, frame_size, samples=25):
+    """
+    Per-pixel median of frames sampled evenly across `video_paths`. A moving fish is
+    in any one pixel only briefly, so the median is the empty tank.
+
+    Returns:
+        BGR uint8 image, or None if no frame of the right size could be read.
+    """
+    width, height = frame_size
+    per_video = max(1, -(-samples // max(len(video_paths), 1)))
+    frames = []
+    for path in video_paths:
+        cap = cv2.VideoCapture(path)
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if count <= 0 or (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))) != (width, height):
+            cap.release()
+            continue
+        for index in np.linspace(0, count - 1, per_video + 2)[1:-1].astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+        cap.release()
+        if len(frames) >= samples:
+            break
+    if not frames:
+        return None
+    return np.median(np.stack(frames[:samples]), axis=0).astype(np.uint8)
+
+
+def _read_cached(path):
+    return cv2.imread(path) if os.path.exists(path) else None
+
+
+def load_or_build_background(video_path, cache_dir, frame_size, camera_id=None, samples=25):
+    """
+    Background for the rig that recorded `video_path`, computed once from the videos in
+    its folder and cached as <cache_dir>/<camera_id>_<w>x<h>.png.
+
+    Batch workers for the same rig start together; a lock file next to the cache lets
+    one of them build the background while the others wait for it.
+    """
+    camera_id = camera_id or default_camera_id(video_path)
+    path = background_cache_path(cache_dir, camera_id, frame_size)
+    lock_path = path + '.lock'
+    os.makedirs(cache_dir, exist_ok=True)
+    while True:
+        background = _read_cached(path)
+        if background is not None:
+            return background
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                # A worker that crashed while building leaves its lock behind
+                if time.time() - os.path.getmtime(lock_path) > STALE_LOCK_S:
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            time.sleep(LOCK_POLL_S)
+
+    try:
+        background = _read_cached(path)  # finished by the previous holder just now
+        if background is None:
+            background = median_background(rig_videos(video_path), frame_size, samples)
+            if background is not None:
+                tmp_path = f"{path}.{os.getpid()}.tmp.png"
+                cv2.imwrite(tmp_path, background)
+                os.replace(tmp_path, path)
+        return background
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
@@ -0,0 +1,101 @@
+import os
+import concurrent.futures
+import cv2
+from tracker_wrapper import track_video, track_video_sharded
+from utils.constants import VIDEO_EXTENSIONS
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def list_videos(video_dir):
+    return sorted(
+        os.path.join(video_dir, f) for f in os.listdir(video_dir)
+        if f.lower().endswith(VIDEO_EXTENSIONS)
+    )
+
+
+def probe_frame_count(video_path):
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    finally:
+        cap.release()
+
+
+def warm_up():
+    """No-op task; unpickling it makes a worker import this module and so the whole tracking stack."""
+    return os.getpid()
+
+
+def start_pool(workers=None):
+    """
+    Start a process pool whose workers have already imported OpenCV, NumPy and the
+    trackers, so the first batch does not pay for process start-up and imports.
+    Pass it to run_batch(executor=...); the caller shuts it down.
+    """
+    workers = workers or default_workers()
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+    for _ in range(workers):
+        executor.submit(warm_up)
+    return executor
+
+
+def longest_first(video_paths):
+    """Order videos by frame count, longest first, so the slowest job never starts last."""
+    return sorted(video_paths, key=probe_frame_count, reverse=True)
+
+
+def run_batch(video_paths, output_dir, workers=None, executor=None, **tracker_options):
+    """
+    Track many videos on a process pool and yield results as they complete.
+
+    All videos are queued up front (longest first) and each worker picks up the next
+    one as soon as it is free, so there is no per-batch barrier.
+
+    Args:
+        video_paths: Videos to process.
+        output_dir: Output root passed to every job.
+        workers: Pool size; defaults to the number of CPU cores.
+        executor: An existing pool (e.g. from start_pool) to run on instead of a new one;
+            it is left running afterwards and `workers` is ignored.
+        tracker_options: Passed through to track_video (tracker name and its options).
+
+    Yields:
+        (video_path, result dict from track_video, completed count, total count)
+    """
+    ordered = longest_first(video_paths)
+    total = len(ordered)
+    workers = min(workers or default_workers(), max(total, 1))
+
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {
+            executor.submit(track_video, video, output_dir, **tracker_options): video
+            for video in ordered
+        }
+        for completed, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            video = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # worker process died
+                result = {'status': 'failed', 'message': f"❌ Failed: {os.path.basename(video)} with error: {e}",
+                          'frames': 0, 'duration_s': None, 'fps': None, 'error': repr(e)}
+            yield video, result, completed, total
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def run_sharded(video_paths, output_dir, shards, **tracker_options):
+    """
+    Track videos one after another, each split into `shards` time segments tracked in
+    parallel (for a few very long recordings, where a per-video pool leaves cores idle).
+    Yields the same tuples as run_batch.
+    """
+    total = len(video_paths)
+    for completed, video in enumerate(video_paths, 1):
+        yield video, track_video_sharded(video, output_dir, shards=shards, **dict(tracker_options)), completed, total
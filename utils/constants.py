@@ -0,0 +1,2 @@
+# Kept free of heavy imports: summary and GUI processes import this without OpenCV.
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov")
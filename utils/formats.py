@@ -0,0 +1,117 @@
+import os
+import json
+import importlib.util
+import numpy as np
+from utils.trajectory import Trajectory, COLUMNS
+
+# pyarrow is optional and slow to import; it is only loaded when a parquet file is written or read
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+# Format name -> file extension. 'npz' is the compressed archive format; 'npy' is one
+# uncompressed structured array that is read memory-mapped, without copying.
+FORMATS = {
+    'csv': '.csv',
+    'npz': '.npz',
+    'npy': '.npy',
+    'parquet': '.parquet',
+}
+
+# When a video has outputs in several formats, the fastest one to read wins
+READ_PREFERENCE = ('npy', 'parquet', 'npz', 'csv')
+
+METADATA_KEY = 'fish_tracking'
+
+
+def available_formats():
+    return tuple(name for name in FORMATS if name != 'parquet' or HAS_PYARROW)
+
+
+def trajectory_path(data_dir, video_name, fmt='csv'):
+    return os.path.join(data_dir, video_name + FORMATS[fmt])
+
+
+def format_of(path):
+    extension = os.path.splitext(path)[1].lower()
+    for name, ext in FORMATS.items():
+        if ext == extension:
+            return name
+    raise ValueError(f"Unknown trajectory format: {path}")
+
+
+def find_trajectories(data_dir):
+    """{video name: path} for every trajectory file in `data_dir`, one per video (see READ_PREFERENCE)."""
+    found = {}
+    for filename in os.listdir(data_dir):
+        name, extension = os.path.splitext(filename)
+        fmt = next((f for f, ext in FORMATS.items() if ext == extension.lower()), None)
+        if fmt is None:
+            continue
+        current = found.get(name)
+        if current is None or READ_PREFERENCE.index(fmt) < READ_PREFERENCE.index(format_of(current)):
+            found[name] = os.path.join(data_dir, filename)
+    return found
+
+
+def write_trajectory(path, trajectory, metadata=None):
+    """
+    Write a Trajectory in the format given by the extension of `path`. Binary formats keep
+    the typed columns and embed `metadata` (the tracker's sidecar dict) where they can;
+    'npy' has no room for it and relies on the sidecar alone.
+    """
+    fmt = format_of(path)
+    if fmt == 'csv':
+        trajectory.write_csv(path)
+    elif fmt == 'npz':
+        extra = {'metadata': np.array(json.dumps(metadata))} if metadata is not None else {}
+        np.savez_compressed(path, **{name: trajectory[name] for name, _ in COLUMNS}, **extra)
+    elif fmt == 'npy':
+        table = np.empty(len(trajectory), dtype=list(COLUMNS))
+        for name, _ in COLUMNS:
+            table[name] = trajectory[name]
+        np.save(path, table)
+    else:
+        if not HAS_PYARROW:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({name: trajectory[name] for name, _ in COLUMNS})
+        if metadata is not None:
+            table = table.replace_schema_metadata({METADATA_KEY: json.dumps(metadata)})
+        pq.write_table(table, path)
+    return path
+
+
+def read_trajectory(path):
+    """
+    Load a trajectory file of any supported format. 'npy' columns are views of a read-only
+    memory map; parquet columns are read from a memory-mapped file and not copied when
+    their types already match.
+    """
+    fmt = format_of(path)
+    if fmt == 'csv':
+        return Trajectory.from_csv(path)
+    if fmt == 'npz':
+        with np.load(path) as archive:
+            return Trajectory.from_columns({name: archive[name] for name, _ in COLUMNS if name in archive})
+    if fmt == 'npy':
+        table = np.load(path, mmap_mode='r')
+        return Trajectory.from_columns({name: table[name] for name in table.dtype.names})
+    if not HAS_PYARROW:
+        raise RuntimeError("Reading parquet files needs pyarrow (pip install pyarrow)")
+    import pyarrow.parquet as pq
+    table = pq.read_table(path, memory_map=True)
+    return Trajectory.from_columns({name: table.column(name).to_numpy() for name in table.column_names})
+
+
+def read_trajectory_metadata(path):
+    """Metadata embedded by write_trajectory, or None (CSV/npy files, or none was written)."""
+    fmt = format_of(path)
+    if fmt == 'npz':
+        with np.load(path) as archive:
+            return json.loads(archive['metadata'].item()) if 'metadata' in archive else None
+    if fmt == 'parquet' and HAS_PYARROW:
+        import pyarrow.parquet as pq
+        schema_metadata = pq.read_schema(path).metadata or {}
+        raw = schema_metadata.get(METADATA_KEY.encode())
+        return json.loads(raw) if raw else None
+    return None
@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+
+
+def gaussian_sigma(ksize):
+    """Sigma OpenCV derives for a Gaussian kernel of size `ksize` when sigma=0."""
+    return 0.3 * ((ksize - 1) * 0.5 - 1) + 0.8
+
+
+class HeatmapAccumulator:
+    """
+    Position histogram binned at a reduced resolution.
+
+    Positions are added in bulk with a single ``np.bincount`` over flattened bin
+    indices, so it can be fed a whole trajectory at once or chunk by chunk while
+    tracking. Blurring happens at the binned resolution; only the final colour
+    image is upsampled to the frame size.
+
+    Args:
+        frame_shape: (height, width) of the video frames in pixels.
+        scale: Bin size relative to a pixel (0.25 -> one bin per 4x4 pixels).
+    """
+
+    def __init__(self, frame_shape, scale=0.25):
+        self.frame_height, self.frame_width = frame_shape[:2]
+        self.scale = scale
+        self.height = max(1, int(round(self.frame_height * scale)))
+        self.width = max(1, int(round(self.frame_width * scale)))
+        self.counts = np.zeros(self.height * self.width, dtype=np.float64)
+
+    def add(self, xs, ys):
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        inside = (xs >= 0) & (xs < self.frame_width) & (ys >= 0) & (ys < self.frame_height)
+        bx = np.minimum((xs[inside] * self.scale).astype(np.intp), self.width - 1)
+        by = np.minimum((ys[inside] * self.scale).astype(np.intp), self.height - 1)
+        self.counts += np.bincount(by * self.width + bx, minlength=self.counts.size)
+
+    def density(self):
+        """Raw visit counts per bin as a (height, width) float32 array."""
+        return self.counts.reshape(self.height, self.width).astype(np.float32)
+
+    def render(self, blur=51):
+        """
+        Colour heatmap at full frame resolution.
+
+        Args:
+            blur: Gaussian kernel size in full-resolution pixels; it is applied at the
+                binned resolution with an equivalently scaled sigma.
+        """
+        heatmap = self.density()
+        sigma = gaussian_sigma(blur) * self.scale
+        if sigma > 0:
+            heatmap = cv2.GaussianBlur(heatmap, (0, 0), sigma)
+        heatmap = cv2.normalize(heatmap, None, 0, 255, cv2.NORM_MINMAX)
+        heatmap = np.uint8(heatmap)
+        heatmap = cv2.resize(heatmap, (self.frame_width, self.frame_height), interpolation=cv2.INTER_LINEAR)
+        return cv2.applyColorMap(heatmap, cv2.COLORMAP_JET)
+
+    def overlay(self, frame, blur=51):
+        return cv2.addWeighted(frame, 0.6, self.render(blur), 0.4, 0)
@@ -0,0 +1,102 @@
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+
+def pixel_scale(frame_width: int, frame_height: int, real_width_cm: float, real_height_cm: float) -> Tuple[float, float]:
+    """cm per pixel along X and Y; kept separate so non-square tanks are measured correctly."""
+    return real_width_cm / frame_width, real_height_cm / frame_height
+
+
+def resample_indices(t_ms: np.ndarray, every_ms: Optional[float] = None, frame_skip: int = 1) -> np.ndarray:
+    """
+    Indices of the samples to keep.
+
+    Args:
+        t_ms: Sample timestamps in ms, non-decreasing.
+        every_ms: Keep the first sample of every `every_ms` window. Takes precedence
+            over `frame_skip` and is independent of frame rate and tracker stride.
+        frame_skip: Keep every n-th row (legacy behaviour).
+    """
+    if every_ms:
+        _, first = np.unique(np.asarray(t_ms, dtype=np.int64) // int(every_ms), return_index=True)
+        return first
+    return np.arange(0, len(t_ms), max(1, frame_skip))
+
+
+def kinematics(
+    t_ms: np.ndarray,
+    cx: np.ndarray,
+    cy: np.ndarray,
+    scale: Tuple[float, float],
+) -> dict:
+    """
+    Vectorised per-step kinematics of a calibrated trajectory.
+
+    Args:
+        t_ms: Timestamps in ms.
+        cx, cy: Centroid pixels.
+        scale: (cm per px along X, cm per px along Y) from pixel_scale.
+
+    Returns:
+        Dict of arrays: ``t_s``, ``x_cm``, ``y_cm`` (N samples) and ``dt_s``,
+        ``step_cm``, ``speed_cm_s`` (N-1 steps) and ``accel_cm_s2`` (N-2).
+    """
+    t_s = np.asarray(t_ms, dtype=np.float64) / 1000.0
+    x_cm = np.asarray(cx, dtype=np.float64) * scale[0]
+    y_cm = np.asarray(cy, dtype=np.float64) * scale[1]
+
+    dt_s = np.diff(t_s)
+    step_cm = np.hypot(np.diff(x_cm), np.diff(y_cm))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = np.where(dt_s > 0, step_cm / dt_s, 0.0)
+        dv = np.diff(speed)
+        dt_mid = (dt_s[1:] + dt_s[:-1]) / 2
+        accel = np.where(dt_mid > 0, dv / dt_mid, 0.0)
+
+    return {
+        't_s': t_s, 'x_cm': x_cm, 'y_cm': y_cm,
+        'dt_s': dt_s, 'step_cm': step_cm, 'speed_cm_s': speed, 'accel_cm_s2': accel,
+    }
+
+
+def time_in_zone(k: dict, zone: Sequence[float]) -> float:
+    """Seconds spent inside `zone` = (x0, y0, x1, y1) in cm; each step counts toward its start sample."""
+    x0, y0, x1, y1 = zone
+    inside = (k['x_cm'][:-1] >= x0) & (k['x_cm'][:-1] < x1) & (k['y_cm'][:-1] >= y0) & (k['y_cm'][:-1] < y1)
+    return float(k['dt_s'][inside].sum())
+
+
+def immobility_bouts(k: dict, speed_threshold_cm_s: float = 0.5, min_duration_s: float = 1.0) -> np.ndarray:
+    """
+    Periods where speed stays below `speed_threshold_cm_s` for at least `min_duration_s`.
+
+    Returns:
+        (M, 2) array of (start_s, end_s).
+    """
+    still = np.concatenate(([False], k['speed_cm_s'] < speed_threshold_cm_s, [False]))
+    edges = np.flatnonzero(np.diff(still.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]  # step indices; step i spans samples i..i+1
+    bouts = np.column_stack((k['t_s'][starts], k['t_s'][ends])) if len(starts) else np.empty((0, 2))
+    return bouts[(bouts[:, 1] - bouts[:, 0]) >= min_duration_s]
+
+
+def summarize(
+    k: dict,
+    speed_threshold_cm_s: float = 0.5,
+    min_immobile_s: float = 1.0,
+    zone: Optional[Sequence[float]] = None,
+) -> dict:
+    """Scalar summary of a kinematics dict."""
+    bouts = immobility_bouts(k, speed_threshold_cm_s, min_immobile_s)
+    duration = float(k['t_s'][-1] - k['t_s'][0]) if len(k['t_s']) else 0.0
+    summary = {
+        'total_distance_cm': float(k['step_cm'].sum()),
+        'duration_s': duration,
+        'mean_speed_cm_s': float(k['step_cm'].sum() / duration) if duration > 0 else 0.0,
+        'max_speed_cm_s': float(k['speed_cm_s'].max()) if len(k['speed_cm_s']) else 0.0,
+        'immobile_time_s': float((bouts[:, 1] - bouts[:, 0]).sum()),
+        'immobility_bouts': int(len(bouts)),
+    }
+    if zone is not None:
+        summary['time_in_zone_s'] = time_in_zone(k, zone)
+    return summary
@@ -0,0 +1,249 @@
+import os
+import json
+import threading
+import time
+import cv2
+import numpy as np
+from utils.heatmap import HeatmapAccumulator
+from utils.kinematics import pixel_scale
+from utils.metadata import write_metadata
+from utils.streaming import StreamingWriter
+
+
+class LatestFrameReader:
+    """
+    Reads a live source on a background thread and keeps only the newest frame.
+
+    A slow consumer therefore never works through a backlog: frames it did not pick up
+    in time are overwritten (counted in `dropped`). Iterating yields
+    ``(frame, sequence number, capture time)``; sequence numbers count every frame read
+    from the source, so gaps mark dropped frames.
+
+    Args:
+        cap: An opened cv2.VideoCapture (camera, RTSP/pipe URL or file).
+        pace_fps: Replay a file at this rate instead of as fast as it decodes, to test
+            the live path offline.
+    """
+
+    def __init__(self, cap, pace_fps=None):
+        self.cap = cap
+        self.pace_fps = pace_fps
+        self.captured = 0
+        self.dropped = 0
+        self._latest = None
+        self._ended = False
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._read_loop, name="live-reader", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _read_loop(self):
+        started = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                captured_at = time.perf_counter()
+                with self._condition:
+                    if self._latest is not None:
+                        self.dropped += 1
+                    self._latest = (frame, self.captured, captured_at)
+                    self.captured += 1
+                    self._condition.notify()
+                if self.pace_fps:
+                    delay = started + self.captured / self.pace_fps - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            with self._condition:
+                self._ended = True
+                self._condition.notify()
+
+    def __iter__(self):
+        while True:
+            with self._condition:
+                while self._latest is None and not self._ended:
+                    self._condition.wait()
+                if self._latest is None:
+                    return
+                item, self._latest = self._latest, None
+            yield item
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+class RunningDistance:
+    """
+    Distance travelled, updated point by point. Like calculate_total_distance with
+    resample_ms, only the first point of every `every_ms` window is used, so centroid
+    jitter between frames does not add up.
+    """
+
+    def __init__(self, frame_size, real_width_cm=28, real_height_cm=14, every_ms=2000):
+        self.sx, self.sy = pixel_scale(frame_size[0], frame_size[1], real_width_cm, real_height_cm)
+        self.every_ms = every_ms
+        self.total_cm = 0.0
+        self.last = None  # (t_ms, cx, cy) of the last counted point
+
+    def add(self, t_ms, cx, cy):
+        for t, x, y in zip(np.asarray(t_ms).tolist(), np.asarray(cx).tolist(), np.asarray(cy).tolist()):
+            if self.last is not None:
+                if t - self.last[0] < self.every_ms:
+                    continue
+                self.total_cm += float(np.hypot((x - self.last[1]) * self.sx, (y - self.last[2]) * self.sy))
+            self.last = (t, x, y)
+        return self.total_cm
+
+
+class LiveTracker:
+    """
+    Tracks a live source in real time with a bounded latency.
+
+    Frames come from a LatestFrameReader, so processing always works on the newest frame;
+    a frame that is older than `max_latency_ms` by the time it is picked up is skipped.
+    Rows are written every `flush_every` rows into time-windowed files that rotate on local
+    wall-clock boundaries every `rotate_s` seconds, e.g. on the hour for 3600 (data/<name>_<start>.csv,
+    heatmaps/<name>_<start>.png and a metadata sidecar; the first window ends at the first boundary). The running heatmap and distance total cover the whole session and are
+    updated at every flush; live/<name>.json reports them together with frame and drop counts.
+
+    Args:
+        tracker: A FishTracker (or subclass) constructed on the live source; only its
+            per-frame processing is used. Timestamps are ms since the session started.
+        realtime: Pace file sources at their frame rate (offline testing of the live path).
+        duration_s: Stop after this many seconds (None: until the source ends or is cancelled).
+    """
+
+    def __init__(self, tracker, rotate_s=3600, max_latency_ms=500, flush_every=30, realtime=False,
+                 duration_s=None, real_width_cm=28, real_height_cm=14, distance_every_ms=2000):
+        if tracker.multi_fish or tracker.stream or tracker.export_video or tracker.background_mode is not None:
+            raise ValueError("Live mode does not support multi_fish, streaming, export_video or background options")
+        self.tracker = tracker
+        self.output_dir = tracker.output_dir
+        self.name = tracker.video_name
+        self.rotate_s = rotate_s
+        self.max_latency_ms = max_latency_ms
+        self.flush_every = flush_every
+        self.realtime = realtime
+        self.duration_s = duration_s
+
+        self.heatmap = HeatmapAccumulator(tracker.frame_size[::-1], scale=tracker.heatmap_scale)
+        self.distance = RunningDistance(tracker.frame_size, real_width_cm, real_height_cm, distance_every_ms)
+        self.late = 0
+        self.latency_ms_max = 0.0
+        self.window_name = None
+        self.window_wall_clock = None
+        self.next_rotation = None
+        self.writer = None
+        self.processed = 0
+        self.files = []
+
+        os.makedirs(os.path.join(self.output_dir, 'live'), exist_ok=True)
+        self.status_path = os.path.join(self.output_dir, 'live', f"{self.name}.json")
+
+    def next_boundary(self, wall_time):
+        """First multiple of rotate_s (in local time, so hourly windows start on the hour) after `wall_time`."""
+        utc_offset = time.localtime(wall_time).tm_gmtoff
+        return ((wall_time + utc_offset) // self.rotate_s + 1) * self.rotate_s - utc_offset
+
+    def unique_window_name(self, wall_clock):
+        stamp = f"{self.name}_{time.strftime('%Y%m%d-%H%M%S', wall_clock)}"
+        name, suffix = stamp, 1
+        # Windows shorter than a second, or a restarted session, must not overwrite earlier files
+        while os.path.exists(os.path.join(self.output_dir, 'data', f"{name}.csv")):
+            suffix += 1
+            name = f"{stamp}-{suffix}"
+        return name
+
+    def open_window(self, wall_time):
+        self.window_wall_clock = time.localtime(wall_time)
+        self.next_rotation = self.next_boundary(wall_time)
+        self.window_name = self.unique_window_name(self.window_wall_clock)
+        csv_path = os.path.join(self.output_dir, 'data', f"{self.window_name}.csv")
+        window_heatmap = HeatmapAccumulator(self.tracker.frame_size[::-1], scale=self.tracker.heatmap_scale)
+        self.writer = StreamingWriter(csv_path, window_heatmap)
+
+    def flush(self):
+        """Fold the buffered rows into the running totals and append them to the window CSV."""
+        traj = self.tracker.trajectory
+        if len(traj):
+            self.heatmap.add(traj['cx'], traj['cy'])
+            self.distance.add(traj['t_ms'], traj['cx'], traj['cy'])
+            self.writer.write(traj)
+
+    def close_window(self):
+        self.flush()
+        self.writer.close()
+        tracker = self.tracker
+        if tracker.valid_frame is not None:
+            heatmap_path = os.path.join(self.output_dir, 'heatmaps', f"{self.window_name}.png")
+            cv2.imwrite(heatmap_path, self.writer.heatmap.overlay(tracker.valid_frame))
+        metadata = tracker.metadata()
+        metadata['live'] = {'window_started': time.strftime('%Y-%m-%d %H:%M:%S', self.window_wall_clock),
+                            'rows': self.writer.rows_written}
+        write_metadata(self.output_dir, self.window_name, metadata)
+        self.files.append(self.writer.csv_path)
+        print(f"🗂️ Closed window {self.window_name} ({self.writer.rows_written} rows)")
+
+    def write_status(self, reader, started):
+        status = {
+            'source': str(self.tracker.video_path),
+            'running_s': round(time.perf_counter() - started, 1),
+            'frames_captured': reader.captured,
+            'frames_processed': self.processed,
+            'frames_dropped': reader.dropped + self.late,
+            'latency_ms_max': round(self.latency_ms_max, 1),
+            'distance_cm': round(self.distance.total_cm, 2),
+            'window': self.window_name,
+        }
+        tmp_path = self.status_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(status, f, indent=2)
+        os.replace(tmp_path, self.status_path)
+        return status
+
+    def run(self):
+        tracker = self.tracker
+        self.processed = 0
+        started = time.perf_counter()
+        self.open_window(time.time())
+        reader = LatestFrameReader(tracker.cap, pace_fps=tracker.fps if self.realtime else None).start()
+        try:
+            for frame, sequence, captured_at in reader:
+                now = time.perf_counter()
+                latency_ms = (now - captured_at) * 1000
+                if latency_ms > self.max_latency_ms:
+                    self.late += 1
+                    continue
+                wall_time = time.time()
+                if wall_time >= self.next_rotation:
+                    self.close_window()
+                    self.open_window(wall_time)
+
+                tracker.frame_index = sequence
+                tracker.frame_ms = (captured_at - started) * 1000
+                keep_going = tracker.handle_frame(frame)
+                self.processed += 1
+                self.latency_ms_max = max(self.latency_ms_max, (time.perf_counter() - captured_at) * 1000)
+
+                if len(tracker.trajectory) >= self.flush_every:
+                    self.flush()
+                    self.write_status(reader, started)
+                if not keep_going or (self.duration_s and now - started >= self.duration_s):
+                    break
+        except KeyboardInterrupt:
+            print("⏹️ Stopped by user")
+        finally:
+            reader.stop()
+            self.close_window()
+            tracker.cap.release()
+            status = self.write_status(reader, started)
+        if self.heatmap.counts.any() and tracker.valid_frame is not None:
+            cv2.imwrite(os.path.join(self.output_dir, 'heatmaps', f"{self.name}_session.png"),
+                        self.heatmap.overlay(tracker.valid_frame))
+        return status
@@ -0,0 +1,63 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+
+MANIFEST_NAME = 'manifest.jsonl'
+HASH_BLOCK = 1 << 20
+
+
+def input_hash(path):
+    """
+    Cheap content fingerprint: file size plus SHA-1 of the first and last MiB.
+    Enough to notice a replaced or re-encoded video without reading hours of footage.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(HASH_BLOCK))
+        if size > HASH_BLOCK:
+            f.seek(max(HASH_BLOCK, size - HASH_BLOCK))
+            digest.update(f.read(HASH_BLOCK))
+    return digest.hexdigest()
+
+
+class JobManifest:
+    """
+    Append-only JSON-lines log of batch jobs in the output folder.
+
+    Each line is one job outcome; the newest line per video wins. Appending (never
+    rewriting) means an interrupted run loses at most the line being written.
+    """
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.jobs = {}
+        self.load()
+
+    def load(self):
+        self.jobs = {}
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                self.jobs[record['video']] = record
+
+    def record(self, video, **fields):
+        record = dict(video=video, updated=datetime.now().isoformat(timespec='seconds'), **fields)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.jobs[video] = record
+        return record
+
+    def is_done(self, video, digest, params):
+        """True when the last run of `video` succeeded with the same input and parameters."""
+        job = self.jobs.get(video)
+        return bool(job) and job.get('status') == 'done' and job.get('input_hash') == digest \
+            and job.get('params') == params
@@ -0,0 +1,25 @@
+import os
+import json
+
+
+def metadata_path(output_dir, video_name):
+    """Sidecar written next to the trajectory CSV: data/<video>.meta.json"""
+    return os.path.join(output_dir, 'data', f"{video_name}.meta.json")
+
+
+def write_metadata(output_dir, video_name, metadata):
+    path = metadata_path(output_dir, video_name)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_metadata(output_dir, video_name):
+    """Return the sidecar dict, or None when it is missing or unreadable."""
+    try:
+        with open(metadata_path(output_dir, video_name), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+class ConstantVelocityKalman:
+    """
+    Kalman filter on the centroid with state (x, y, vx, vy); one step per processed frame.
+
+    Args:
+        process_noise: How much the fish may accelerate between frames (px/frame^2).
+        measurement_noise: Centroid jitter from segmentation (px).
+    """
+
+    def __init__(self, process_noise=2.0, measurement_noise=3.0):
+        self.F = np.array([[1, 0, 1, 0],
+                           [0, 1, 0, 1],
+                           [0, 0, 1, 0],
+                           [0, 0, 0, 1]], dtype=np.float64)
+        self.H = np.eye(2, 4)
+        q = process_noise ** 2
+        # Piecewise-constant acceleration model
+        self.Q = q * np.array([[0.25, 0, 0.5, 0],
+                               [0, 0.25, 0, 0.5],
+                               [0.5, 0, 1, 0],
+                               [0, 0.5, 0, 1]])
+        self.R = np.eye(2) * measurement_noise ** 2
+        self.reset()
+
+    def reset(self):
+        self.x = np.zeros(4)
+        self.P = np.eye(4) * 1e3
+        self.initialized = False
+
+    def predict(self):
+        """Advance one frame and return the predicted (x, y)."""
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        return self.x[0], self.x[1]
+
+    def update(self, cx, cy):
+        if not self.initialized:
+            self.x[:] = (cx, cy, 0.0, 0.0)
+            self.P = np.diag([self.R[0, 0], self.R[1, 1], 100.0, 100.0])
+            self.initialized = True
+            return
+        innovation = np.array((cx, cy)) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ innovation
+        self.P = (np.eye(4) - K @ self.H) @ self.P
+
+    def position_uncertainty(self):
+        """1-sigma position uncertainty in px."""
+        return float(np.sqrt(max(self.P[0, 0], self.P[1, 1])))
@@ -0,0 +1,93 @@
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class StreamOptions:
+    """
+    Streaming output: rows are flushed to the CSV every `chunk_size` frames and folded into a
+    running heatmap, so memory stays bounded on long videos.
+
+    Args:
+        chunk_size: Rows held in memory between flushes.
+        checkpoint_interval: Persist enough state to resume every N frames (0: no checkpoints).
+        resume: Continue from the video's last checkpoint when there is a usable one.
+        resume_warmup_frames: Frames before the resume point replayed into MOG2 without logging.
+    """
+    chunk_size: int = 1000
+    checkpoint_interval: int = 0
+    resume: bool = False
+    resume_warmup_frames: int = 120
+
+    def __post_init__(self):
+        if self.chunk_size < 1:
+            raise ValueError(f"Chunk size must be at least 1: {self.chunk_size}")
+        if self.checkpoint_interval < 0:
+            raise ValueError(f"Checkpoint interval must not be negative: {self.checkpoint_interval}")
+
+
+@dataclass(frozen=True)
+class SegmentationOptions:
+    """
+    Where and at what size frames are segmented; the per-frame workspace is sized from these.
+
+    Args:
+        roi: Tank area (x, y, w, h) in full-frame px; None uses the saved rois/<video>.json, if any.
+        processing_scale: Downscale factor applied to the ROI crop before segmentation.
+        min_area: Smallest fish contour, in full-resolution px.
+    """
+    roi: Optional[Tuple[int, int, int, int]] = None
+    processing_scale: float = 1.0
+    min_area: float = 500
+
+    def __post_init__(self):
+        if self.processing_scale <= 0:
+            raise ValueError(f"Processing scale must be positive: {self.processing_scale}")
+        if self.roi is not None:
+            object.__setattr__(self, 'roi', tuple(self.roi))
+
+
+@dataclass(frozen=True)
+class SearchOptions:
+    """
+    Predictive search (single fish): a constant-velocity Kalman filter limits the contour
+    search to a window around the predicted centroid.
+
+    Args:
+        margin: Window size as a multiple of the last bbox size.
+    """
+    margin: float = 3.0
+
+    def __post_init__(self):
+        if self.margin <= 0:
+            raise ValueError(f"Search margin must be positive: {self.margin}")
+
+
+@dataclass(frozen=True)
+class BackgroundOptions:
+    """
+    Rig background: the median of frames sampled from every video in the folder, cached per
+    camera and resolution under backgrounds/.
+
+    Args:
+        mode: 'seed' starts MOG2 from it (no warm-up ghosts); 'static' replaces MOG2 with a
+            plain difference against it.
+        camera_id: Cache key (default: the video's folder name).
+        samples: Frames sampled per video when the background is built.
+        static_threshold: Grey-level difference counted as foreground in 'static' mode.
+    """
+    mode: str = 'seed'
+    camera_id: Optional[str] = None
+    samples: int = 25
+    static_threshold: int = 30
+
+    def __post_init__(self):
+        if self.mode not in ('seed', 'static'):
+            raise ValueError(f"Unknown background mode: {self.mode}")
+        if self.samples < 1:
+            raise ValueError(f"Background samples must be at least 1: {self.samples}")
+
+
+def as_params(options):
+    """Tracker options as JSON-friendly values (option groups become dicts), e.g. for the job manifest."""
+    return {name: asdict(value) if is_dataclass(value) else value for name, value in options.items()}
@@ -0,0 +1,127 @@
+import queue
+import threading
+import time
+import cv2
+
+_END = object()
+
+
+def skip_frames(cap, count, seek=False):
+    """
+    Advance `count` frames without decoding them to images. grab() only demuxes and
+    decodes; seek=True jumps with CAP_PROP_POS_FRAMES instead, which is cheaper for
+    large strides on keyframe-dense files.
+    """
+    if count <= 0:
+        return
+    if seek:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, cap.get(cv2.CAP_PROP_POS_FRAMES) + count)
+        return
+    for _ in range(count):
+        if not cap.grab():
+            return
+
+
+class FramePrefetcher:
+    """
+    Decodes frames on a background thread into a bounded queue.
+
+    OpenCV releases the GIL while decoding, so the consumer can run background
+    subtraction and morphology on frame N while frame N+1 is being decoded.
+    Iterating yields ``(frame, pts_ms)``; ``pts_ms`` is None when `query_pts` is off.
+
+    Args:
+        cap: An opened cv2.VideoCapture, positioned where decoding should start.
+        maxsize: Queue depth; bounds memory to `maxsize` decoded frames.
+        query_pts: Read CAP_PROP_POS_MSEC on the decoder thread for each frame.
+        stride: Only every `stride`-th frame is queued; the rest are skipped with skip_frames.
+        seek: Skip by seeking instead of grabbing.
+    """
+
+    def __init__(self, cap, maxsize=8, query_pts=True, stride=1, seek=False):
+        self.cap = cap
+        self.query_pts = query_pts
+        self.stride = stride
+        self.seek = seek
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._decode_loop, name="frame-prefetch", daemon=True)
+
+        self.frames = 0
+        self.decode_s = 0.0
+        self.decoder_blocked_s = 0.0
+        self.consumer_wait_s = 0.0
+        self._depth_sum = 0
+        self.depth_max = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode_loop(self):
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                ret, frame = self.cap.read()
+                t1 = time.perf_counter()
+                if not ret:
+                    break
+                pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) if self.query_pts else None
+                self.decode_s += t1 - t0
+                if not self._put((frame, pts)):
+                    break
+                self.decoder_blocked_s += time.perf_counter() - t1
+                t2 = time.perf_counter()
+                skip_frames(self.cap, self.stride - 1, self.seek)
+                self.decode_s += time.perf_counter() - t2
+        except Exception as e:
+            self.error = e
+        finally:
+            self._put(_END)
+
+    def __iter__(self):
+        while True:
+            depth = self.queue.qsize()
+            self._depth_sum += depth
+            self.depth_max = max(self.depth_max, depth)
+            t0 = time.perf_counter()
+            item = self.queue.get()
+            self.consumer_wait_s += time.perf_counter() - t0
+            if item is _END:
+                if self.error is not None:
+                    raise self.error
+                return
+            self.frames += 1
+            yield item
+
+    def stop(self):
+        self._stop.set()
+        # Unblock a decoder waiting on a full queue
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._thread.join(timeout=5)
+
+    def stats(self):
+        frames = max(self.frames, 1)
+        return {
+            'frames': self.frames,
+            'queue_size': self.queue.maxsize,
+            'queue_depth_mean': round(self._depth_sum / frames, 2),
+            'queue_depth_max': self.depth_max,
+            'decode_ms_per_frame': round(1000 * self.decode_s / frames, 3),
+            'decoder_blocked_ms_total': round(1000 * self.decoder_blocked_s, 1),
+            'consumer_wait_ms_total': round(1000 * self.consumer_wait_s, 1),
+        }
@@ -0,0 +1,164 @@
+import os
+import json
+import math
+import time
+
+# Log-spaced histogram: 8 buckets per power of two (~9% resolution) from 1 ns up to ~18 minutes.
+BUCKETS_PER_OCTAVE = 8
+NUM_BUCKETS = 40 * BUCKETS_PER_OCTAVE
+
+
+def bucket_index(ns):
+    return min(int(math.log2(max(ns, 1)) * BUCKETS_PER_OCTAVE), NUM_BUCKETS - 1)
+
+
+def bucket_value_ms(index):
+    """Geometric centre of a bucket, in ms."""
+    return 2 ** ((index + 0.5) / BUCKETS_PER_OCTAVE) / 1e6
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off; every hook is an empty method."""
+    enabled = False
+
+    def start(self):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def merge(self, stages):
+        pass
+
+    def report(self):
+        return None
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class StageProfiler:
+    """
+    Per-stage frame timings, aggregated into fixed-size log histograms.
+
+    Call ``start()`` at the top of the frame and ``lap(stage)`` after each stage;
+    the time since the previous mark is charged to `stage`. Memory is constant
+    regardless of video length.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}
+        self._mark = 0
+        self._started = time.perf_counter()
+
+    def start(self):
+        self._mark = time.perf_counter_ns()
+
+    def lap(self, stage):
+        now = time.perf_counter_ns()
+        elapsed = now - self._mark
+        self._mark = now
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {'count': 0, 'total_ns': 0, 'max_ns': 0, 'hist': [0] * NUM_BUCKETS}
+        entry['count'] += 1
+        entry['total_ns'] += elapsed
+        if elapsed > entry['max_ns']:
+            entry['max_ns'] = elapsed
+        entry['hist'][bucket_index(elapsed)] += 1
+
+    def merge(self, stages):
+        """Add another profiler's raw `stages` (e.g. from a worker process) to this one."""
+        for name, other in stages.items():
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = {'count': 0, 'total_ns': 0, 'max_ns': 0, 'hist': [0] * NUM_BUCKETS}
+            entry['count'] += other['count']
+            entry['total_ns'] += other['total_ns']
+            entry['max_ns'] = max(entry['max_ns'], other['max_ns'])
+            entry['hist'] = [a + b for a, b in zip(entry['hist'], other['hist'])]
+
+    def report(self):
+        return {
+            'wall_s': round(time.perf_counter() - self._started, 3),
+            'stages': {name: summarize_stage(entry) for name, entry in self.stages.items()},
+        }
+
+
+def percentile_ms(hist, q):
+    total = sum(hist)
+    if not total:
+        return 0.0
+    target = q * total
+    running = 0
+    for index, count in enumerate(hist):
+        running += count
+        if running >= target:
+            return round(bucket_value_ms(index), 4)
+    return round(bucket_value_ms(len(hist) - 1), 4)
+
+
+def summarize_stage(entry):
+    count = max(entry['count'], 1)
+    hist = entry['hist']
+    return {
+        'count': entry['count'],
+        'total_ms': round(entry['total_ns'] / 1e6, 3),
+        'mean_ms': round(entry['total_ns'] / count / 1e6, 4),
+        'p50_ms': percentile_ms(hist, 0.50),
+        'p90_ms': percentile_ms(hist, 0.90),
+        'p99_ms': percentile_ms(hist, 0.99),
+        'max_ms': round(entry['max_ns'] / 1e6, 4),
+        # Sparse histogram so batch roll-ups can merge reports exactly
+        'histogram': {str(i): c for i, c in enumerate(hist) if c},
+    }
+
+
+def make_profiler(enabled):
+    return StageProfiler() if enabled else NULL_PROFILER
+
+
+def profile_path(output_dir, video_name):
+    folder = os.path.join(output_dir, 'profiles')
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{video_name}.json")
+
+
+def write_report(path, report, **extra):
+    report = dict(report, **extra)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def rollup(report_paths):
+    """
+    Merge per-video profile reports into one batch summary.
+
+    Returns:
+        {stage: summary} with percentiles computed from the merged histograms.
+    """
+    merged = {}
+    for path in report_paths:
+        try:
+            with open(path, encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, stage in report.get('stages', {}).items():
+            entry = merged.setdefault(name, {'count': 0, 'total_ns': 0, 'max_ns': 0, 'hist': [0] * NUM_BUCKETS})
+            entry['count'] += stage['count']
+            entry['total_ns'] += int(stage['total_ms'] * 1e6)
+            entry['max_ns'] = max(entry['max_ns'], int(stage['max_ms'] * 1e6))
+            for index, count in stage.get('histogram', {}).items():
+                entry['hist'][int(index)] += count
+    return {name: summarize_stage(entry) for name, entry in merged.items()}
+
+
+def format_rollup(summary):
+    lines = [f"{'stage':<12}{'frames':>10}{'mean ms':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'total s':>10}"]
+    for name, s in sorted(summary.items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(f"{name:<12}{s['count']:>10}{s['mean_ms']:>10.3f}{s['p50_ms']:>9.3f}"
+                     f"{s['p90_ms']:>9.3f}{s['p99_ms']:>9.3f}{s['total_ms'] / 1000:>10.2f}")
+    return lines
@@ -0,0 +1,51 @@
+import os
+import json
+import cv2
+
+
+def roi_file(output_dir, video_name=None):
+    """Per-video ROI file, or the folder-wide default when `video_name` is None."""
+    return os.path.join(output_dir, 'rois', f"{video_name or 'default'}.json")
+
+
+def save_roi(path, roi):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'x': roi[0], 'y': roi[1], 'w': roi[2], 'h': roi[3]}, f)
+
+
+def load_roi(output_dir, video_name):
+    """Return (x, y, w, h) from the per-video ROI file, falling back to the folder default."""
+    for path in (roi_file(output_dir, video_name), roi_file(output_dir)):
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            return int(data['x']), int(data['y']), int(data['w']), int(data['h'])
+    return None
+
+
+def clamp_roi(roi, frame_shape):
+    x, y, w, h = roi
+    height, width = frame_shape[:2]
+    x, y = max(0, min(x, width - 1)), max(0, min(y, height - 1))
+    return x, y, max(1, min(w, width - x)), max(1, min(h, height - y))
+
+
+def select_roi(cap):
+    """Let the user drag the tank area on the first frame; rewinds the capture afterwards."""
+    print("🖱️ Select the ROI (fish tank area), then press ENTER or SPACE.")
+    ret, frame = cap.read()
+    if not ret:
+        raise RuntimeError("Couldn't read frame to select ROI.")
+
+    cv2.namedWindow("Select ROI", cv2.WINDOW_NORMAL)
+    cv2.resizeWindow("Select ROI", 1024, 768)
+    roi = tuple(int(v) for v in cv2.selectROI("Select ROI", frame, fromCenter=False, showCrosshair=True))
+    cv2.destroyWindow("Select ROI")
+
+    if roi == (0, 0, 0, 0):
+        raise ValueError("No ROI selected!")
+
+    print(f"✅ ROI selected: {roi}")
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Reset to first frame after ROI selection
+    return roi
@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+from utils.tracker import FishTracker
+
+
+class SimpleFishTracker(FishTracker):
+    """
+    Dark-object + frame-difference detector. It copes better with still fish than MOG2: a dark
+    blob that also moved since the previous frame is preferred, and a dark blob alone is used
+    when nothing moved.
+
+    Everything except detection (ROI from rois/, outputs, streaming, batch control, export)
+    is inherited from FishTracker. Per-frame images go into buffers allocated on the first
+    frame and reused through dst= arguments.
+
+    Args:
+        dark_threshold: Grey level below which a pixel counts as fish.
+        motion_min_area: Minimum area (full-resolution px) of a moving dark blob.
+        still_min_area: Minimum area of a dark blob used when nothing moved.
+    """
+
+    name = 'simple'
+
+    def __init__(self, video_path, output_dir, dark_threshold=60, motion_min_area=200, still_min_area=300,
+                 **options):
+        if options.get('multi_fish') or options.get('search') is not None or options.get('background') is not None:
+            raise ValueError("The simple tracker does not support multi_fish, search or background options")
+        super().__init__(video_path, output_dir, **options)
+        self.dark_threshold = dark_threshold
+        self.motion_min_area = motion_min_area
+        self.still_min_area = still_min_area
+        self.buffers = None
+        self.has_previous = False
+        self.still_fish = False  # the current box came from the dark-only fallback
+
+    def allocate_buffers(self, shape):
+        self.buffers = {name: np.empty(shape[:2], dtype=np.uint8)
+                        for name in ('gray', 'previous', 'blurred', 'diff', 'dark', 'motion', 'combined')}
+        self.has_previous = False
+
+    def first_contour(self, mask, min_area, ox, oy):
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for cnt in contours:
+            if cv2.contourArea(cnt) >= min_area:
+                return self.to_frame_bbox(cv2.boundingRect(cnt), ox, oy)
+        return None
+
+    def process_frame(self, frame):
+        prof = self.profiler
+        small, ox, oy = self.segmentation_input(frame)
+        b = self.buffers
+        if b is None or b['gray'].shape != small.shape[:2]:
+            self.allocate_buffers(small.shape)
+            b = self.buffers
+
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=b['gray'])
+        cv2.threshold(gray, self.dark_threshold, 255, cv2.THRESH_BINARY_INV, dst=b['dark'])
+        prof.lap('threshold')
+
+        self.current_boxes = []
+        self.still_fish = False
+        if not self.has_previous:
+            # First frame: nothing to difference against yet
+            b['gray'], b['previous'] = b['previous'], b['gray']
+            self.has_previous = True
+            return frame
+
+        # The blurred current frame is compared with the unblurred previous one, as before
+        cv2.GaussianBlur(gray, (3, 3), 0, dst=b['blurred'])
+        cv2.absdiff(b['blurred'], b['previous'], dst=b['diff'])
+        cv2.threshold(b['diff'], 1, 255, cv2.THRESH_BINARY, dst=b['motion'])
+        prof.lap('background')
+
+        cv2.bitwise_and(b['dark'], b['motion'], dst=b['combined'])
+        cv2.morphologyEx(b['combined'], cv2.MORPH_OPEN, self.kernel, dst=b['combined'])
+        prof.lap('morphology')
+
+        area_scale = self.processing_scale ** 2
+        bbox = self.first_contour(b['combined'], self.motion_min_area * area_scale, ox, oy)
+        if bbox is None:
+            # Still fish: fall back to the dark mask alone
+            bbox = self.first_contour(b['dark'], self.still_min_area * area_scale, ox, oy)
+            self.still_fish = bbox is not None
+        prof.lap('contours')
+
+        if bbox is not None:
+            x, y, w, h = bbox
+            self.last_bbox = bbox
+            self.log_centroid(x + w // 2, y + h // 2, bbox)
+            self.current_boxes = [(bbox, None)]
+        b['gray'], b['previous'] = b['previous'], b['gray']
+        prof.lap('tracking')
+        return frame
+
+    def annotate(self, frame):
+        super().annotate(frame)
+        if self.still_fish:
+            # Still fish found by the dark mask alone are boxed in yellow
+            (x, y, w, h), _ = self.current_boxes[0]
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 255), 2)
+        if self.roi:
+            x, y, w, h = self.roi
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 0, 0), 2)
+        return frame
+
+    def metadata(self):
+        metadata = super().metadata()
+        metadata['tracker'].update(dark_threshold=self.dark_threshold, motion_min_area=self.motion_min_area,
+                                   still_min_area=self.still_min_area)
+        return metadata
@@ -0,0 +1,130 @@
+import io
+import os
+import re
+import glob
+import csv
+import json
+import numpy as np
+from utils.trajectory import CSV_HEADER
+
+
+class StreamingWriter:
+    """
+    Appends trajectory chunks to the CSV while tracking and folds them into a
+    running heatmap, so the tracker only ever holds one chunk in memory.
+
+    Args:
+        csv_path: Output CSV path.
+        heatmap: HeatmapAccumulator that receives every flushed chunk.
+        resume_offset: Byte offset recorded by a checkpoint. When given, the CSV is
+            truncated there and appended to instead of being rewritten.
+    """
+
+    def __init__(self, csv_path, heatmap, resume_offset=None, buffer_size=1 << 20):
+        self.csv_path = csv_path
+        self.heatmap = heatmap
+        self.rows_written = 0
+        if resume_offset is not None and os.path.exists(csv_path):
+            self.file = open(csv_path, 'r+', newline='', buffering=buffer_size)
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+        else:
+            self.file = open(csv_path, 'w', newline='', buffering=buffer_size)
+            csv.writer(self.file).writerow(CSV_HEADER)
+        self.writer = csv.writer(self.file)
+
+    def write(self, trajectory):
+        """Write the trajectory's rows, add them to the heatmap and clear it."""
+        if not len(trajectory):
+            return
+        self.writer.writerows(trajectory.csv_rows())
+        self.heatmap.add(trajectory['cx'], trajectory['cy'])
+        self.rows_written += len(trajectory)
+        trajectory.clear()
+
+    def sync(self):
+        """Push buffered rows to disk and return the current file offset."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def checkpoint_base(output_dir, video_name):
+    folder = os.path.join(output_dir, 'checkpoints')
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, video_name)
+
+
+def _write_synced(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_state(base):
+    try:
+        with open(base + '.json', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(base, state, heatmap_counts=None):
+    """
+    Write a resumable checkpoint. The heatmap counts go to a file named after this
+    checkpoint's sequence number, and the JSON that names it is replaced atomically and
+    last. Until then the previous JSON still points at the previous checkpoint's file,
+    so a crash at any point leaves one consistent checkpoint.
+    """
+    previous = _read_state(base)
+    sequence = previous.get('sequence', 0) + 1 if previous else 1
+    state['sequence'] = sequence
+    if heatmap_counts is not None:
+        state['heatmap_file'] = f"{os.path.basename(base)}_{sequence}_heatmap.npy"
+        buffer = io.BytesIO()
+        np.save(buffer, heatmap_counts)
+        _write_synced(os.path.join(os.path.dirname(base), state['heatmap_file']), buffer.getvalue())
+
+    tmp_path = base + '.json.tmp'
+    _write_synced(tmp_path, json.dumps(state).encode('utf-8'))
+    os.replace(tmp_path, base + '.json')
+    if previous and previous.get('heatmap_file'):
+        try:
+            os.remove(os.path.join(os.path.dirname(base), previous['heatmap_file']))
+        except OSError:
+            pass
+
+
+def load_checkpoint(base):
+    """
+    Return (state, heatmap_counts), or None if there is no usable checkpoint
+    (missing, or its heatmap file is unreadable), in which case the run starts fresh.
+    """
+    state = _read_state(base)
+    if state is None:
+        return None
+    heatmap_counts = None
+    if state.get('heatmap_file'):
+        try:
+            heatmap_counts = np.load(os.path.join(os.path.dirname(base), state['heatmap_file']))
+        except (OSError, ValueError, EOFError) as e:
+            print(f"⚠️ Ignoring checkpoint {os.path.basename(base)}: {e}")
+            return None
+    return state, heatmap_counts
+
+
+def remove_checkpoint(base):
+    # Includes the heatmap of a checkpoint whose JSON was never written (crash mid-save)
+    pattern = re.compile(re.escape(os.path.basename(base)) + r'_\d+_heatmap\.npy$')
+    leftovers = [path for path in glob.glob(glob.escape(base) + '_*')
+                 if pattern.match(os.path.basename(path))]
+    for path in leftovers + [base + '.json', base + '.json.tmp']:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
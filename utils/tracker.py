@@ -1,126 +1,708 @@
 import cv2
 import numpy as np
-import time
 import os
-import csv
+import time
+from collections import deque
+from utils.background import load_or_build_background
+from utils.formats import available_formats, trajectory_path, write_trajectory
+from utils.heatmap import HeatmapAccumulator
+from utils.metadata import write_metadata
+from utils.profiling import make_profiler, profile_path, write_report
+from utils.pipeline import FramePrefetcher, skip_frames
+from utils.roi import load_roi, save_roi, roi_file, clamp_roi, select_roi
+from utils.streaming import StreamingWriter, checkpoint_base, save_checkpoint, load_checkpoint, remove_checkpoint
+from utils.association import associate
+from utils.motion import ConstantVelocityKalman
+from utils.options import SegmentationOptions, StreamOptions
+from utils.trajectory import Trajectory, DETECTED, INTERPOLATED, format_time, write_multi_csv
+from utils.video_export import AnnotatedVideoWriter, annotated_video_path
 
 class FishTracker:
-    def __init__(self, video_path, output_dir, show_window=False):
+    name = 'mog2'
+    # Multi-fish mode: a new detection only becomes a fish once it has been matched on this
+    # many consecutive frames, so noise blobs and short-lived splits do not get an ID
+    confirm_frames = 4
+
+    def __init__(self, video_path, output_dir, show_window=False, max_speed=False,
+                 heatmap_scale=0.25, save_density=False,
+                 stream=None,
+                 pipelined=False, prefetch=8,
+                 segmentation=SegmentationOptions(),
+                 frame_stride=1, stride_seek=False, profile=False,
+                 multi_fish=False, max_fish=None, gate_distance=100, association='greedy',
+                 search=None,
+                 background=None,
+                 progress=None, progress_interval=50, cancel=None, pause=None, output_format='csv',
+                 export_video=False, export_scale=1.0, export_every=1, trail_length=50,
+                 start_frame=0, end_frame=None, warmup_frames=0, video_name=None):
+        # Invalid option combinations are rejected before the video is opened
+        if output_format not in available_formats():
+            raise ValueError(f"Output format not available: {output_format}")
+        if start_frame and stream is not None:
+            raise ValueError("start_frame does not support streaming output")
+        if multi_fish and stream is not None:
+            raise ValueError("multi_fish mode does not support streaming output")
+        if multi_fish and output_format != 'csv':
+            raise ValueError("multi_fish mode only writes CSV output")
+        if multi_fish and search is not None:
+            raise ValueError("multi_fish mode does not support predictive search")
+
         self.video_path = video_path
         self.output_dir = output_dir
+        # video_path may also be a camera index or stream URL (live mode), which then needs a video_name
+        self.video_name = video_name or os.path.splitext(os.path.basename(str(video_path)))[0]
         self.cap = cv2.VideoCapture(video_path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_interval_ms = 1000.0 / self.fps
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
         self.fgbg = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=16, detectShadows=True)
 
+        # Only every frame_stride-th frame is decoded and segmented. MOG2's history is counted in
+        # processed frames, so it is shortened to keep the same background time constant.
+        self.frame_stride = max(1, int(frame_stride))
+        self.stride_seek = stride_seek
+        if self.frame_stride > 1:
+            self.fgbg.setHistory(max(1, round(self.fgbg.getHistory() / self.frame_stride)))
+
         self.last_bbox = None
         self.no_movement_frames = 0
         self.max_no_movement_frames = 10
 
-        self.centroid_data = []
-        self.positions = []
+        # Segmentation (segmentation: SegmentationOptions) runs on the ROI crop, resized by
+        # processing_scale; results are mapped back to full-frame pixels. Without an explicit
+        # roi, a saved one (rois/<video>.json) is used.
+        self.roi = segmentation.roi or load_roi(output_dir, self.video_name)
+        self.processing_scale = segmentation.processing_scale
+        self.min_area = segmentation.min_area
+        self.scaled_min_area = self.min_area * self.processing_scale ** 2
+
+        # Per-frame workspace: the kernel is built once and the masks are allocated on the first
+        # frame (and again only if the segmentation size changes), then filled through dst=.
+        # The downscaled segmentation input has its own buffer, valid until the next frame.
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        self.workspace = None
+        self.resized = None
+
+        self.trajectory = Trajectory()
         self.valid_frame = None
-        self.start_time = self.current_time_ms()
+
+        # Timestamps come from the video timeline (frame index / PTS), never the wall clock.
+        # In max_speed mode the PTS query is skipped and time is derived from index / fps.
+        self.frame_index = -1
+        self.frame_ms = 0.0
+        self.max_speed = max_speed
 
         self.show_window = show_window
 
+        # Frames are only drawn on when something shows or stores them: the preview window or
+        # the annotated MP4 (annotated/<video>.mp4, every export_every-th processed frame,
+        # resized by export_scale and encoded on its own thread).
+        self.export_video = export_video
+        self.export_scale = export_scale
+        self.export_every = max(1, int(export_every))
+        self.exporter = None
+        self.annotate_frames = show_window or export_video
+        self.current_boxes = []  # [(bbox, fish id or None)] found on the current frame
+        self.trail_length = trail_length
+        self.trails = {}
+
+        # Heatmap is binned at heatmap_scale of the frame size; save_density also writes the raw bins (.npy)
+        self.heatmap_scale = heatmap_scale
+        self.save_density = save_density
+
         os.makedirs(os.path.join(output_dir, 'data'), exist_ok=True)
         os.makedirs(os.path.join(output_dir, 'heatmaps'), exist_ok=True)
 
-    def current_time_ms(self):
-        return int(round(time.time() * 1000))
+        # Streaming mode (stream: StreamOptions): rows are flushed to the CSV every chunk_size frames
+        # and folded into a running heatmap. checkpoint_interval (frames) additionally persists
+        # enough state to resume.
+        self.stream = stream is not None
+        stream = stream or StreamOptions()
+        self.chunk_size = stream.chunk_size
+        self.checkpoint_interval = stream.checkpoint_interval
+        self.resume = stream.resume
+        self.resume_warmup_frames = stream.resume_warmup_frames
+        self.csv_path = os.path.join(output_dir, 'data', f"{self.video_name}.csv")
+        # Final trajectory file (see utils.formats). Streaming always writes the CSV; it is
+        # converted once tracking finishes when another format was asked for.
+        self.output_format = output_format
+        self.trajectory_path = trajectory_path(os.path.join(output_dir, 'data'), self.video_name, output_format)
+        self.checkpoint_path = checkpoint_base(output_dir, self.video_name) \
+            if self.checkpoint_interval or self.resume else None
+        self.writer = None
+        self.next_checkpoint = self.checkpoint_interval
+
+        # Pipelined mode decodes on a prefetch thread; per-stage stats end up in pipeline_stats
+        self.pipelined = pipelined
+        self.prefetch = prefetch
+        self.pipeline_stats = None
+
+        # Per-stage timings; when profile is off this is a no-op object
+        self.profiler = make_profiler(profile)
+
+        # Multi-fish mode keeps every contour over min_area and links detections to fish IDs
+        # by nearest-neighbour matching within gate_distance (full-frame px).
+        self.multi_fish = multi_fish
+        self.max_fish = max_fish
+        self.gate_distance = gate_distance
+        self.association = association
+        self.tracks = {}             # fish id -> {'bbox': (x, y, w, h), 'missed': frames without a match}
+        self.tentative = []          # [{'bbox', 'rows': [(frame, t_ms, bbox), ...]}] not yet confirmed
+        self.fish_trajectories = {}  # fish id -> Trajectory
+        self.next_fish_id = 1
+        # Predictive mode (search: SearchOptions): a constant-velocity Kalman filter limits contour
+        # search to a window (search.margin x the last bbox size) around the predicted centroid.
+        self.motion = ConstantVelocityKalman() if search is not None else None
+        self.search_margin = search.margin if search is not None else None
+
+        # Rig background (background: BackgroundOptions): the median of frames sampled from every
+        # video in the folder, cached per camera and resolution under backgrounds/. 'seed' starts
+        # MOG2 from it (no warm-up ghosts), 'static' replaces MOG2 with a plain difference against it.
+        self.background_mode = background.mode if background is not None else None
+        self.camera_id = background.camera_id if background is not None else None
+        self.background_samples = background.samples if background is not None else None
+        self.static_threshold = background.static_threshold if background is not None else None
+        self.background = None
+        self.static_background = None
+
+        # Batch control: progress(frames_done, frame_count) is called every progress_interval
+        # frames; cancel and pause are Event-like flags (is_set()) checked at the same points.
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.next_progress = progress_interval
+        self.cancel = cancel
+        self.pause = pause
+        self.cancelled = False
+
+        # Segment mode (used by sharded runs): only frames in [start_frame, end_frame) are logged.
+        # Tracking starts warmup_frames earlier, so the background model and the hold/prediction
+        # state have converged by start_frame. Both are aligned to frame_stride.
+        stride = self.frame_stride
+        self.start_frame = -(-int(start_frame) // stride) * stride
+        self.end_frame = end_frame
+        self.warmup_frames = -(-int(warmup_frames) // stride) * stride
 
     def format_time(self, ms):
-        seconds = ms // 1000
-        minutes = seconds // 60
-        hours = minutes // 60
-        milliseconds = ms % 1000
-        return f'{hours:02}:{minutes % 60:02}:{seconds % 60:02}:{milliseconds:03}'
-
-    def log_centroid(self, cx, cy):
-        t_ms = self.current_time_ms() - self.start_time
-        timestamp = self.format_time(t_ms)
-        self.centroid_data.append([timestamp, cx, cy])
-        self.positions.append((cx, cy))
+        return format_time(ms)
+
+    def update_frame_time(self, pts=None):
+        self.frame_index += 1
+        index_ms = self.frame_index * self.frame_interval_ms
+        if self.max_speed:
+            self.frame_ms = index_ms
+            return
+        if pts is None:
+            pts = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        # Some backends report 0 for every frame; fall back to the nominal frame rate
+        self.frame_ms = pts if pts > 0 or self.frame_index == 0 else index_ms
+
+    def log_centroid(self, cx, cy, bbox, detected=DETECTED):
+        if self.frame_index < self.start_frame:
+            return  # warm-up before a segment start
+        # Formatting to hh:mm:ss:ms is deferred to save_results
+        self.trajectory.append(self.frame_index, int(round(self.frame_ms)), cx, cy, bbox, detected)
 
         # Print every 30 frames only to reduce flooding
-        #if len(self.centroid_data) % 30 == 0:
-            #print(f"Time: {timestamp}, Centroid: ({cx}, {cy})")
+        #if len(self.trajectory) % 30 == 0:
+            #print(f"Frame: {self.frame_index}, Centroid: ({cx}, {cy})")
 
-    def process_frame(self, frame):
-        fgmask = self.fgbg.apply(frame)
+    def select_roi(self):
+        """Pick the tank area interactively and persist it for later (headless) runs."""
+        self.roi = select_roi(self.cap)
+        save_roi(roi_file(self.output_dir, self.video_name), self.roi)
+        return self.roi
+
+    def segmentation_input(self, frame):
+        """Crop to the ROI and downscale; returns the image plus its (x, y) offset in the frame."""
+        ox = oy = 0
+        if self.roi:
+            self.roi = clamp_roi(self.roi, frame.shape)
+            ox, oy, w, h = self.roi
+            frame = frame[oy:oy + h, ox:ox + w]
+        if self.processing_scale != 1.0:
+            # Same size resize() derives from fx/fy; a mismatch would only make it reallocate
+            size = (round(frame.shape[0] * self.processing_scale), round(frame.shape[1] * self.processing_scale))
+            if self.resized is None or self.resized.shape[:2] != size or self.resized.shape[2:] != frame.shape[2:]:
+                self.resized = np.empty(size + frame.shape[2:], dtype=frame.dtype)
+            frame = cv2.resize(frame, None, dst=self.resized, fx=self.processing_scale, fy=self.processing_scale,
+                               interpolation=cv2.INTER_AREA)
+        return frame, ox, oy
+
+    def to_frame_bbox(self, bbox, ox, oy):
+        x, y, w, h = bbox
+        if self.processing_scale != 1.0:
+            s = self.processing_scale
+            x, y, w, h = int(round(x / s)), int(round(y / s)), int(round(w / s)), int(round(h / s))
+        return x + ox, y + oy, w, h
 
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        fgmask = cv2.morphologyEx(fgmask, cv2.MORPH_CLOSE, kernel)
-        fgmask = cv2.morphologyEx(fgmask, cv2.MORPH_OPEN, kernel)
+    def allocate_workspace(self, shape):
+        self.workspace = {name: np.empty(shape[:2], dtype=np.uint8) for name in ('foreground', 'clean', 'gray')}
 
-        contours, _ = cv2.findContours(fgmask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    def clean_mask(self, fgmask, window=None):
+        """
+        Close then open with the 5x5 ellipse. Close (dilate, erode) followed by open (erode,
+        dilate) is run fused as dilate, erode x2, dilate into the reusable 'clean' mask.
+        With `window` = (x0, y0, x1, y1) only that region is cleaned; returns a view of it.
+        """
+        clean = self.workspace['clean']
+        if window is not None:
+            x0, y0, x1, y1 = window
+            fgmask, clean = fgmask[y0:y1, x0:x1], clean[y0:y1, x0:x1]
+        cv2.dilate(fgmask, self.kernel, dst=clean)
+        cv2.erode(clean, self.kernel, dst=clean, iterations=2)
+        cv2.dilate(clean, self.kernel, dst=clean)
+        self.profiler.lap('morphology')
+        return clean
 
-        detected = False
+    def find_fish(self, fgmask, ox, oy, window=None):
+        """
+        Clean the mask and return the first contour over min_area as a full-frame bbox.
+        With `window` = (x0, y0, x1, y1) in mask coordinates, only that region is scanned.
+        """
+        wx, wy = window[:2] if window is not None else (0, 0)
+        contours, _ = cv2.findContours(self.clean_mask(fgmask, window), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        bbox = None
         for cnt in contours:
-            if cv2.contourArea(cnt) < 500:
+            if cv2.contourArea(cnt) < self.scaled_min_area:
                 continue
             x, y, w, h = cv2.boundingRect(cnt)
-            cx, cy = x + w // 2, y + h // 2
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            self.log_centroid(cx, cy)
-            self.last_bbox = (x, y, w, h)
-            detected = True
+            bbox = self.to_frame_bbox((x + wx, y + wy, w, h), ox, oy)
             break
+        self.profiler.lap('contours')
+        return bbox
+
+    def search_window(self, center, mask_shape, ox, oy):
+        """Mask-space window around a predicted full-frame centre, sized from the last bbox and filter uncertainty."""
+        _, _, w, h = self.last_bbox
+        half = max(self.search_margin * max(w, h) / 2, 3 * self.motion.position_uncertainty(), 16)
+        s = self.processing_scale
+        cx, cy = (center[0] - ox) * s, (center[1] - oy) * s
+        half *= s
+        height, width = mask_shape[:2]
+        x0, y0 = max(0, int(cx - half)), max(0, int(cy - half))
+        x1, y1 = min(width, int(cx + half) + 1), min(height, int(cy + half) + 1)
+        return (x0, y0, x1, y1) if x1 > x0 and y1 > y0 else None
+
+    def prepare_background(self):
+        """Load (or build and cache) the rig background and seed or replace MOG2 with it."""
+        if self.background_mode is None:
+            return
+        self.background = load_or_build_background(self.video_path, os.path.join(self.output_dir, 'backgrounds'),
+                                                   self.frame_size, self.camera_id, self.background_samples)
+        if self.background is None:
+            print(f"⚠️ No background model for {self.video_name}; using MOG2 from scratch")
+            return
+        small = self.segmentation_input(self.background)[0]
+        if self.background_mode == 'static':
+            self.static_background = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            return
+        # The seed replaces MOG2's first frame, which would otherwise count the fish (and
+        # everything else) as background and leave a ghost blob for the first seconds.
+        self.fgbg.apply(small, learningRate=1.0)
+
+    def subtract_background(self, small):
+        """Foreground mask of the segmentation input, written into the workspace."""
+        ws = self.workspace
+        if ws is None or ws['foreground'].shape != small.shape[:2]:
+            self.allocate_workspace(small.shape)
+            ws = self.workspace
+        if self.static_background is None:
+            return self.fgbg.apply(small, ws['foreground'])
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=ws['gray'])
+        cv2.absdiff(gray, self.static_background, dst=gray)
+        cv2.threshold(gray, self.static_threshold, 255, cv2.THRESH_BINARY, dst=ws['foreground'])
+        return ws['foreground']
+
+    def process_frame(self, frame):
+        prof = self.profiler
+        small, ox, oy = self.segmentation_input(frame)
+        fgmask = self.subtract_background(small)
+        prof.lap('background')
 
-        if not detected and self.last_bbox and self.no_movement_frames <= self.max_no_movement_frames:
+        if self.multi_fish:
+            contours, _ = cv2.findContours(self.clean_mask(fgmask), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            bboxes = [self.to_frame_bbox(cv2.boundingRect(cnt), ox, oy)
+                      for cnt in contours if cv2.contourArea(cnt) >= self.scaled_min_area]
+            prof.lap('contours')
+            self.update_tracks(bboxes)
+            prof.lap('tracking')
+            return frame
+
+        # Predictive mode: scan a window around the predicted position first and fall back
+        # to the full mask only when the fish is not found there.
+        bbox = predicted = None
+        if self.motion is not None and self.motion.initialized:
+            predicted = self.motion.predict()
+            window = self.search_window(predicted, fgmask.shape, ox, oy)
+            if window is not None:
+                bbox = self.find_fish(fgmask, ox, oy, window)
+        if bbox is None:
+            bbox = self.find_fish(fgmask, ox, oy)
+
+        if bbox is not None:
+            x, y, w, h = bbox
+            cx, cy = x + w // 2, y + h // 2
+            self.last_bbox = bbox
+            self.log_centroid(cx, cy, self.last_bbox)
+            self.no_movement_frames = 0
+            if self.motion is not None:
+                self.motion.update(cx, cy)
+        elif self.last_bbox and self.no_movement_frames <= self.max_no_movement_frames:
             x, y, w, h = self.last_bbox
+            if predicted is not None:
+                # Coast along the predicted path instead of freezing at the last box
+                frame_h, frame_w = frame.shape[:2]
+                x = min(max(0, int(round(predicted[0])) - w // 2), max(0, frame_w - w))
+                y = min(max(0, int(round(predicted[1])) - h // 2), max(0, frame_h - h))
+                self.last_bbox = (x, y, w, h)
             cx, cy = x + w // 2, y + h // 2
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            self.log_centroid(cx, cy)
+            self.log_centroid(cx, cy, self.last_bbox, INTERPOLATED)
             self.no_movement_frames += 1
-        elif detected:
-            self.no_movement_frames = 0
+            bbox = self.last_bbox
+        elif self.motion is not None:
+            self.motion.reset()  # lost: next detection re-initialises the filter
+        self.current_boxes = [(bbox, None)] if bbox is not None else []
+        prof.lap('tracking')
 
         return frame
 
+    def annotate(self, frame):
+        """Draw the current boxes, recent centroid trails and the video timestamp onto `frame`."""
+        for (x, y, w, h), fish_id in self.current_boxes:
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            if fish_id is not None:
+                cv2.putText(frame, str(fish_id), (x, max(0, y - 4)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            trail = self.trails.get(fish_id)
+            if trail is None:
+                trail = self.trails[fish_id] = deque(maxlen=self.trail_length)
+            trail.append((x + w // 2, y + h // 2))
+        if self.multi_fish:
+            self.trails = {fish_id: trail for fish_id, trail in self.trails.items() if fish_id in self.tracks}
+        for trail in self.trails.values():
+            for point in trail:
+                cv2.circle(frame, point, 2, (0, 255, 255), -1)
+        cv2.putText(frame, format_time(int(round(self.frame_ms))), (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7,
+                    (255, 255, 255), 2)
+        return frame
+
+    def log_fish(self, fish_id, bbox, detected=DETECTED, frame_index=None, t_ms=None):
+        if frame_index is None:
+            frame_index, t_ms = self.frame_index, int(round(self.frame_ms))
+        if frame_index < self.start_frame:
+            return
+        x, y, w, h = bbox
+        traj = self.fish_trajectories.get(fish_id)
+        if traj is None:
+            traj = self.fish_trajectories[fish_id] = Trajectory(capacity=1024)
+        traj.append(frame_index, t_ms, x + w // 2, y + h // 2, bbox, detected)
+
+    def update_tracks(self, bboxes):
+        ids = list(self.tracks)
+        track_xy = [(b[0] + b[2] // 2, b[1] + b[3] // 2) for b in (self.tracks[i]['bbox'] for i in ids)]
+        det_xy = [(x + w // 2, y + h // 2) for x, y, w, h in bboxes]
+        matches, lost, new = associate(track_xy, det_xy, self.gate_distance, self.association)
+
+        for ti, di in matches:
+            track = self.tracks[ids[ti]]
+            track['bbox'] = bboxes[di]
+            track['missed'] = 0
+            self.log_fish(ids[ti], track['bbox'])
+
+        # Unmatched fish hold their last position for a while, like the single-fish fallback
+        for ti in lost:
+            track = self.tracks[ids[ti]]
+            track['missed'] += 1
+            if track['missed'] > self.max_no_movement_frames:
+                del self.tracks[ids[ti]]
+            else:
+                self.log_fish(ids[ti], track['bbox'], INTERPOLATED)
+
+        self.update_tentative([bboxes[di] for di in new])
+        self.current_boxes = [(track['bbox'], fish_id) for fish_id, track in self.tracks.items()]
+
+    def update_tentative(self, bboxes):
+        """
+        Link detections no fish claimed to candidate tracks. A candidate that is missed once is
+        dropped; one matched on confirm_frames consecutive frames gets a fish ID and its rows.
+        """
+        candidates = self.tentative
+        candidate_xy = [(b[0] + b[2] // 2, b[1] + b[3] // 2) for b in (c['bbox'] for c in candidates)]
+        det_xy = [(x + w // 2, y + h // 2) for x, y, w, h in bboxes]
+        matches, _, new = associate(candidate_xy, det_xy, self.gate_distance, self.association)
+        row = (self.frame_index, int(round(self.frame_ms)))
+
+        self.tentative = []
+        for ci, di in matches:
+            candidate = candidates[ci]
+            candidate['bbox'] = bboxes[di]
+            candidate['rows'].append(row + (bboxes[di],))
+            del candidate['rows'][:-self.confirm_frames]  # bounded while max_fish blocks confirming it
+            self.tentative.append(candidate)
+        self.tentative.extend({'bbox': bboxes[di], 'rows': [row + (bboxes[di],)]} for di in new)
+
+        for candidate in list(self.tentative):
+            if len(candidate['rows']) < self.confirm_frames:
+                continue
+            if self.max_fish is not None and len(self.tracks) >= self.max_fish:
+                break
+            self.tentative.remove(candidate)
+            fish_id = self.next_fish_id
+            self.next_fish_id += 1
+            self.tracks[fish_id] = {'bbox': candidate['bbox'], 'missed': 0}
+            for frame_index, t_ms, bbox in candidate['rows']:
+                self.log_fish(fish_id, bbox, frame_index=frame_index, t_ms=t_ms)
+
+    def open_stream(self):
+        heatmap = HeatmapAccumulator(self.frame_size[::-1], scale=self.heatmap_scale)
+        checkpoint = load_checkpoint(self.checkpoint_path) if self.resume else None
+        if checkpoint is None:
+            self.writer = StreamingWriter(self.csv_path, heatmap)
+            return
+
+        state, heatmap_counts = checkpoint
+        if heatmap_counts is not None and heatmap_counts.shape == heatmap.counts.shape:
+            heatmap.counts[:] = heatmap_counts
+        self.writer = StreamingWriter(self.csv_path, heatmap, resume_offset=state['csv_offset'])
+        self.writer.rows_written = state['rows_written']
+        self.last_bbox = tuple(state['last_bbox']) if state['last_bbox'] else None
+        self.no_movement_frames = state['no_movement_frames']
+
+        # Re-converge the background model like a shard's warm-up: starting from the fresh (or
+        # rig-seeded) model, replay a short run of frames before the resume point without logging.
+        # Seeding it with the background image at the checkpoint instead can carry the fish into
+        # the model and leave a ghost once it moves on.
+        next_frame = state['next_frame']
+        # The static model needs no re-convergence
+        warmup = self.resume_warmup_frames if self.static_background is None else 0
+        warmup_start = max(0, next_frame - warmup)
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, warmup_start)
+        for index in range(warmup_start, next_frame):
+            if (next_frame - index) % self.frame_stride:
+                if not self.cap.grab():
+                    break
+                continue
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.fgbg.apply(self.segmentation_input(frame)[0])
+        self.frame_index = next_frame - 1
+        if self.checkpoint_interval:
+            self.next_checkpoint = next_frame // self.checkpoint_interval * self.checkpoint_interval \
+                + self.checkpoint_interval
+        print(f"⏩ Resuming {self.video_name} at frame {next_frame}")
+
+    def checkpoint(self):
+        self.next_checkpoint = (self.frame_index + 1) // self.checkpoint_interval * self.checkpoint_interval \
+            + self.checkpoint_interval
+        self.writer.write(self.trajectory)
+        state = {
+            'next_frame': self.frame_index + self.frame_stride,
+            'frame_ms': self.frame_ms,
+            'csv_offset': self.writer.sync(),
+            'rows_written': self.writer.rows_written,
+            'last_bbox': list(self.last_bbox) if self.last_bbox else None,
+            'no_movement_frames': self.no_movement_frames,
+        }
+        save_checkpoint(self.checkpoint_path, state, heatmap_counts=self.writer.heatmap.counts)
+
     def run(self):
+        try:
+            self.prepare_background()
+            if self.stream:
+                self.open_stream()
+            elif self.start_frame:
+                first = max(0, self.start_frame - self.warmup_frames)
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+                self.frame_index = first - 1
+            if self.export_video:
+                self.exporter = AnnotatedVideoWriter(annotated_video_path(self.output_dir, self.video_name),
+                                                     self.fps / (self.frame_stride * self.export_every),
+                                                     self.frame_size, scale=self.export_scale).start()
+
+            if self.pipelined:
+                self.run_pipelined()
+            else:
+                self.run_sequential()
+        except BaseException:
+            # Rows streamed since the last checkpoint are truncated again on resume
+            if self.writer is not None:
+                self.writer.close()
+            raise
+        finally:
+            if self.exporter is not None:
+                self.exporter.close()
+            self.cap.release()
+            if self.show_window:
+                cv2.destroyAllWindows()
+
+    def run_sequential(self):
+        prof = self.profiler
         while self.cap.isOpened():
+            prof.start()
             ret, frame = self.cap.read()
             if not ret:
                 break
-            self.valid_frame = frame
-            processed = self.process_frame(frame)
+            self.update_frame_time()
+            prof.lap('decode')
+            if self.past_end() or not self.handle_frame(frame):
+                break
+            if self.frame_stride > 1:
+                skip_frames(self.cap, self.frame_stride - 1, self.stride_seek)
+                self.frame_index += self.frame_stride - 1
+                prof.lap('skip')
 
-            if self.show_window:
-                cv2.imshow("Fish Tracking", processed)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+    def run_pipelined(self):
+        prefetcher = FramePrefetcher(self.cap, maxsize=self.prefetch, query_pts=not self.max_speed,
+                                     stride=self.frame_stride, seek=self.stride_seek).start()
+        process_s = 0.0
+        prof = self.profiler
+        try:
+            prof.start()
+            for frame, pts in prefetcher:
+                # In pipelined mode 'decode' is the time spent waiting on the prefetch queue
+                prof.lap('decode')
+                t0 = time.perf_counter()
+                self.update_frame_time(pts)
+                if self.past_end():
+                    break
+                keep_going = self.handle_frame(frame)
+                self.frame_index += self.frame_stride - 1
+                process_s += time.perf_counter() - t0
+                prof.start()
+                if not keep_going:
                     break
+        finally:
+            prefetcher.stop()
+        self.pipeline_stats = prefetcher.stats()
+        self.pipeline_stats['process_ms_per_frame'] = round(1000 * process_s / max(prefetcher.frames, 1), 3)
 
-        self.cap.release()
-        if self.show_window:
-            cv2.destroyAllWindows()
+    def past_end(self):
+        return self.end_frame is not None and self.frame_index >= self.end_frame
+
+    def handle_frame(self, frame):
+        """Process one decoded frame; returns False when the user asked to stop."""
+        self.valid_frame = frame
+        processed = self.process_frame(frame)
+
+        if self.annotate_frames:
+            self.annotate(processed)
+            if self.exporter is not None and self.frame_index // self.frame_stride % self.export_every == 0:
+                self.exporter.write(processed)
+            self.profiler.lap('drawing')
+
+        if self.writer is not None:
+            if len(self.trajectory) >= self.chunk_size:
+                self.writer.write(self.trajectory)
+            if self.checkpoint_interval and self.frame_index + 1 >= self.next_checkpoint:
+                self.checkpoint()
+            self.profiler.lap('io')
+
+        if self.show_window and not self.show_frame(processed):
+            return False
+
+        if self.frame_index + 1 >= self.next_progress:
+            self.next_progress = self.frame_index + 1 + self.progress_interval
+            return self.report_progress()
+        return True
+
+    def show_frame(self, frame):
+        """Show the annotated frame in the preview window; returns False when 'q' was pressed."""
+        cv2.imshow("Fish Tracking", frame)
+        key = cv2.waitKey(1) & 0xFF
+        self.profiler.lap('display')
+        return key != ord('q')
+
+    def report_progress(self):
+        """Report progress and honour pause/cancel; returns False when the run should stop."""
+        if self.progress is not None:
+            self.progress(self.frame_index + 1, self.frame_count)
+        while self.pause is not None and self.pause.is_set() and not self.is_cancelled():
+            time.sleep(0.2)
+        if self.is_cancelled():
+            self.cancelled = True
+            return False
+        return True
+
+    def is_cancelled(self):
+        return self.cancel is not None and self.cancel.is_set()
+
+    def metadata(self):
+        """Video properties and tracker parameters stored in the data/<video>.meta.json sidecar."""
+        height, width = self.valid_frame.shape[:2] if self.valid_frame is not None else self.frame_size[::-1]
+        return {
+            'video': os.path.basename(str(self.video_path)),
+            'width': width,
+            'height': height,
+            'fps': self.fps,
+            'frame_count': self.frame_count,
+            'roi': list(self.roi) if self.roi else None,
+            'tracker': {
+                'name': self.name,
+                'processing_scale': self.processing_scale,
+                'min_area': self.min_area,
+                'frame_stride': self.frame_stride,
+                'max_no_movement_frames': self.max_no_movement_frames,
+                'max_speed': self.max_speed,
+                'multi_fish': self.multi_fish,
+                'predictive': self.motion is not None,
+                'background': self.background_mode if self.background is not None else None,
+            },
+            'output_format': self.output_format,
+            'fish_ids': sorted(self.fish_trajectories) if self.multi_fish else None,
+        }
+
+    def save_multi_fish_results(self, csv_path):
+        """Write the per-fish CSV and per-fish heatmaps; returns the combined heatmap."""
+        write_multi_csv(csv_path, self.fish_trajectories)
+        combined = HeatmapAccumulator(self.valid_frame.shape, scale=self.heatmap_scale)
+        for fish_id, traj in sorted(self.fish_trajectories.items()):
+            heatmap = HeatmapAccumulator(self.valid_frame.shape, scale=self.heatmap_scale)
+            heatmap.add(traj['cx'], traj['cy'])
+            combined.counts += heatmap.counts
+            path = os.path.join(self.output_dir, 'heatmaps', f"{self.video_name}_fish{fish_id}.png")
+            cv2.imwrite(path, heatmap.overlay(self.valid_frame))
+        return combined
 
     def save_results(self):
+        self.profiler.start()
+        if self.writer is not None:
+            self.writer.write(self.trajectory)
+            self.writer.close()
+
         if self.valid_frame is None:
             print("No valid frame captured.")
             return
 
-        video_name = os.path.splitext(os.path.basename(self.video_path))[0]
-        csv_path = os.path.join(self.output_dir, 'data', f"{video_name}.csv")
-        with open(csv_path, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Time_hh:mm:ss:ms', 'Centroid_X', 'Centroid_Y'])
-            writer.writerows(self.centroid_data)
-
-        heatmap = np.zeros((self.valid_frame.shape[0], self.valid_frame.shape[1]), dtype=np.float32)
-        for x, y in self.positions:
-            if 0 <= y < heatmap.shape[0] and 0 <= x < heatmap.shape[1]:
-                cv2.circle(heatmap, (x, y), radius=3, color=(1,), thickness=-1)
-
-        heatmap = cv2.GaussianBlur(heatmap, (51, 51), 0)
-        heatmap = cv2.normalize(heatmap, None, 0, 255, cv2.NORM_MINMAX)
-        heatmap = np.uint8(heatmap)
-        heatmap_colored = cv2.applyColorMap(heatmap, cv2.COLORMAP_JET)
-
-        overlay = cv2.addWeighted(self.valid_frame, 0.6, heatmap_colored, 0.4, 0)
+        video_name = self.video_name
+        data_path = self.trajectory_path
+        if self.multi_fish:
+            heatmap = self.save_multi_fish_results(data_path)
+        elif self.writer is not None:
+            heatmap = self.writer.heatmap
+            if self.output_format != 'csv':
+                write_trajectory(data_path, Trajectory.from_csv(self.csv_path), self.metadata())
+                os.remove(self.csv_path)
+        else:
+            write_trajectory(data_path, self.trajectory, self.metadata())
+            heatmap = HeatmapAccumulator(self.valid_frame.shape, scale=self.heatmap_scale)
+            heatmap.add(self.trajectory['cx'], self.trajectory['cy'])
+        overlay = heatmap.overlay(self.valid_frame)
 
         heatmap_path = os.path.join(self.output_dir, 'heatmaps', f"{video_name}.png")
         cv2.imwrite(heatmap_path, overlay)
-        print(f"Results saved:\n  CSV: {csv_path}\n  Heatmap: {heatmap_path}")
+        if self.save_density:
+            np.save(os.path.join(self.output_dir, 'heatmaps', f"{video_name}.npy"), heatmap.density())
+        if self.checkpoint_path:
+            remove_checkpoint(self.checkpoint_path)
+        write_metadata(self.output_dir, video_name, self.metadata())
+        self.profiler.lap('save')
+        if self.profiler.enabled:
+            write_report(profile_path(self.output_dir, video_name), self.profiler.report(),
+                         video=os.path.basename(str(self.video_path)), frames=len(self.trajectory) if self.writer is None
+                         else self.writer.rows_written, pipeline=self.pipeline_stats)
+        print(f"Results saved:\n  Data: {data_path}\n  Heatmap: {heatmap_path}")
 
         if self.show_window:
             cv2.imshow("Fish Heatmap Overlay", overlay)
@@ -0,0 +1,234 @@
+import csv
+import warnings
+import numpy as np
+
+DETECTED = 1
+INTERPOLATED = 0
+
+# Column name -> dtype. int32 is plenty for pixels, frame indices and ms (~24 days).
+COLUMNS = (
+    ('frame', np.int32),
+    ('t_ms', np.int32),
+    ('cx', np.int32),
+    ('cy', np.int32),
+    ('x', np.int32),
+    ('y', np.int32),
+    ('w', np.int32),
+    ('h', np.int32),
+    ('detected', np.uint8),
+)
+
+CSV_HEADER = ['Frame', 'Time_ms', 'Time_hh:mm:ss:ms', 'Centroid_X', 'Centroid_Y',
+              'BBox_X', 'BBox_Y', 'BBox_W', 'BBox_H', 'Detected']
+
+
+def format_time(ms):
+    seconds = ms // 1000
+    minutes = seconds // 60
+    hours = minutes // 60
+    milliseconds = ms % 1000
+    return f'{hours:02}:{minutes % 60:02}:{seconds % 60:02}:{milliseconds:03}'
+
+
+def parse_time(text):
+    hours, minutes, seconds, milliseconds = (int(part) for part in text.split(':'))
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + milliseconds
+
+
+class Trajectory:
+    """
+    Growable, column-oriented store for per-frame tracking results.
+
+    Each column is a preallocated NumPy array that doubles when full, so a row costs
+    ~33 bytes instead of a list/tuple of boxed Python ints. Columns are read through
+    item access (``traj['cx']``), which returns a view of the filled part.
+    """
+
+    def __init__(self, capacity=4096):
+        self._size = 0
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS}
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, name):
+        return self._columns[name][:self._size]
+
+    @property
+    def capacity(self):
+        return len(self._columns['frame'])
+
+    @property
+    def nbytes(self):
+        return sum(col.nbytes for col in self._columns.values())
+
+    def _grow(self, min_capacity):
+        capacity = max(self.capacity * 2, min_capacity, 16)
+        for name, col in self._columns.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:self._size] = col[:self._size]
+            self._columns[name] = grown
+
+    def append(self, frame, t_ms, cx, cy, bbox, detected=DETECTED):
+        i = self._size
+        if i == self.capacity:
+            self._grow(i + 1)
+        cols = self._columns
+        x, y, w, h = bbox
+        cols['frame'][i] = frame
+        cols['t_ms'][i] = t_ms
+        cols['cx'][i] = cx
+        cols['cy'][i] = cy
+        cols['x'][i] = x
+        cols['y'][i] = y
+        cols['w'][i] = w
+        cols['h'][i] = h
+        cols['detected'][i] = detected
+        self._size = i + 1
+
+    def extend(self, **columns):
+        """Append whole columns at once; missing columns are filled with zeros."""
+        n = len(next(iter(columns.values())))
+        if self._size + n > self.capacity:
+            self._grow(self._size + n)
+        for name, col in self._columns.items():
+            col[self._size:self._size + n] = columns.get(name, 0)
+        self._size += n
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Wrap existing column arrays, e.g. from a memory-mapped file. Columns that already
+        have the right dtype are used as is (no copy); missing ones are zero-filled.
+        """
+        size = len(columns['frame'])
+        traj = cls(capacity=0)
+        traj._columns = {name: np.asarray(columns[name], dtype=dtype) if name in columns
+                         else np.zeros(size, dtype=dtype) for name, dtype in COLUMNS}
+        traj._size = size
+        return traj
+
+    def clear(self):
+        self._size = 0
+
+    def positions(self):
+        """(N, 2) int32 array of centroids."""
+        return np.column_stack((self['cx'], self['cy']))
+
+    def csv_rows(self):
+        for frame, t_ms, cx, cy, x, y, w, h, detected in zip(*(self[name].tolist() for name, _ in COLUMNS)):
+            yield [frame, t_ms, format_time(t_ms), cx, cy, x, y, w, h, detected]
+
+    def write_csv(self, csv_path):
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            writer.writerows(self.csv_rows())
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        """
+        Load a tracker CSV. Files written by this tracker are read in one bulk
+        np.loadtxt call; older files that only have the time string and centroid
+        columns fall back to row-by-row parsing, with the row number as frame index.
+        """
+        with open(csv_path, newline='') as f:
+            header = next(csv.reader(f), [])
+        if header == CSV_HEADER:
+            try:
+                return cls._from_csv_bulk(csv_path)
+            except ValueError:
+                pass
+        return cls._from_csv_rows(csv_path)
+
+    @classmethod
+    def _from_csv_bulk(cls, csv_path):
+        names = ('frame', 't_ms', 'cx', 'cy', 'x', 'y', 'w', 'h', 'detected')
+        usecols = [CSV_HEADER.index(h) for h in ('Frame', 'Time_ms', 'Centroid_X', 'Centroid_Y',
+                                                 'BBox_X', 'BBox_Y', 'BBox_W', 'BBox_H', 'Detected')]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)  # header-only file
+            data = np.loadtxt(csv_path, delimiter=',', skiprows=1, usecols=usecols, dtype=np.int64, ndmin=2)
+        traj = cls(capacity=max(len(data), 16))
+        if len(data):
+            traj.extend(**dict(zip(names, data.T)))
+        return traj
+
+    @classmethod
+    def _from_csv_rows(cls, csv_path):
+        traj = cls()
+        with open(csv_path, newline='') as f:
+            reader = csv.DictReader(f)
+            for idx, row in enumerate(reader):
+                try:
+                    cx = int(row['Centroid_X'])
+                    cy = int(row['Centroid_Y'])
+                    frame = int(row['Frame']) if row.get('Frame') else idx
+                    if row.get('Time_ms'):
+                        t_ms = int(row['Time_ms'])
+                    else:
+                        t_ms = parse_time(row['Time_hh:mm:ss:ms'])
+                    bbox = tuple(int(row.get(k) or 0) for k in ('BBox_X', 'BBox_Y', 'BBox_W', 'BBox_H'))
+                    detected = int(row.get('Detected') or DETECTED)
+                except (KeyError, ValueError):
+                    print(f"Skipping invalid row in {csv_path}: {row}")
+                    continue
+                traj.append(frame, t_ms, cx, cy, bbox, detected)
+        return traj
+
+
+MULTI_CSV_PREFIX = ['Frame', 'Time_ms', 'Time_hh:mm:ss:ms']
+MULTI_FIELDS = ('X', 'Y', 'Detected')
+
+
+def is_multi_header(header):
+    return header[:3] == MULTI_CSV_PREFIX and len(header) > 3 and header[3].startswith('Fish')
+
+
+def write_multi_csv(csv_path, tracks):
+    """
+    Write per-fish trajectories side by side: one row per frame and Fish<id>_X/_Y/_Detected
+    columns per fish. Cells are empty on frames where a fish has no position.
+
+    Args:
+        tracks: {fish_id: Trajectory}
+    """
+    ids = sorted(tracks)
+    frames = np.unique(np.concatenate([tracks[i]['frame'] for i in ids])) if ids else np.empty(0, np.int32)
+    t_ms = np.zeros(len(frames), dtype=np.int64)
+    table = np.full((len(frames), 3 * len(ids)), -1, dtype=np.int64)
+    for col, fish_id in enumerate(ids):
+        traj = tracks[fish_id]
+        rows = np.searchsorted(frames, traj['frame'])
+        t_ms[rows] = traj['t_ms']
+        table[rows, 3 * col] = traj['cx']
+        table[rows, 3 * col + 1] = traj['cy']
+        table[rows, 3 * col + 2] = traj['detected']
+
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(MULTI_CSV_PREFIX + [f'Fish{i}_{field}' for i in ids for field in MULTI_FIELDS])
+        for frame, t, values in zip(frames.tolist(), t_ms.tolist(), table.tolist()):
+            writer.writerow([frame, t, format_time(t)] + ['' if v < 0 else v for v in values])
+
+
+def read_multi_csv(csv_path):
+    """Inverse of write_multi_csv; returns {fish_id: Trajectory} (bbox columns are zero)."""
+    with open(csv_path, newline='') as f:
+        header = next(csv.reader(f))
+    ids = [int(name[4:-2]) for name in header[3::3]]
+    usecols = [0, 1] + list(range(3, len(header)))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        data = np.genfromtxt(csv_path, delimiter=',', skip_header=1, usecols=usecols,
+                             filling_values=-1, dtype=np.int64, ndmin=2)
+    tracks = {}
+    for col, fish_id in enumerate(ids):
+        x, y, detected = data[:, 2 + 3 * col], data[:, 3 + 3 * col], data[:, 4 + 3 * col]
+        present = x >= 0
+        traj = Trajectory(capacity=max(int(present.sum()), 16))
+        if present.any():
+            traj.extend(frame=data[present, 0], t_ms=data[present, 1], cx=x[present], cy=y[present],
+                        detected=detected[present])
+        tracks[fish_id] = traj
+    return tracks
@@ -0,0 +1,77 @@
+import os
+import queue
+import threading
+import time
+import cv2
+
+_END = object()
+
+
+def annotated_video_path(output_dir, video_name):
+    folder = os.path.join(output_dir, 'annotated')
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{video_name}.mp4")
+
+
+class AnnotatedVideoWriter:
+    """
+    Encodes annotated frames on a background thread so tracking never waits on the encoder,
+    except when the bounded queue is full (then write() blocks rather than dropping frames).
+
+    Args:
+        path: Output .mp4 path.
+        fps: Frame rate of the written video (i.e. of the frames passed to write()).
+        frame_size: (width, height) of the frames passed to write().
+        scale: Resize factor applied on the writer thread (e.g. 0.5 for QA previews).
+        maxsize: Queue depth; bounds memory to `maxsize` full-size frames.
+    """
+
+    def __init__(self, path, fps, frame_size, scale=1.0, maxsize=16, fourcc='mp4v'):
+        self.path = path
+        self.scale = scale
+        width, height = frame_size
+        self.size = (max(2, int(round(width * scale)) // 2 * 2), max(2, int(round(height * scale)) // 2 * 2))
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, self.size)
+        if not self.writer.isOpened():
+            raise RuntimeError(f"Could not open video writer for {path}")
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.error = None
+        self.frames = 0
+        self.blocked_s = 0.0
+        self._thread = threading.Thread(target=self._encode_loop, name="video-export", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def write(self, frame):
+        if self.error is not None:
+            raise self.error
+        t0 = time.perf_counter()
+        self.queue.put(frame)
+        self.blocked_s += time.perf_counter() - t0
+
+    def _encode_loop(self):
+        try:
+            while True:
+                frame = self.queue.get()
+                if frame is _END:
+                    return
+                if frame.shape[1::-1] != self.size:
+                    frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+                self.writer.write(frame)
+                self.frames += 1
+        except Exception as e:
+            self.error = e
+            # Keep draining so a blocked producer can finish
+            while self.queue.get() is not _END:
+                pass
+        finally:
+            self.writer.release()
+
+    def close(self):
+        self.queue.put(_END)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.path